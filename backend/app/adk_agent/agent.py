@@ -5,6 +5,7 @@ from google.adk.tools import FunctionTool
 from google.adk.runners import Runner
 from google.genai import types
 from copy import deepcopy
+from functools import lru_cache
 import re
 from typing import Dict, Any, List, Optional
 import os, asyncio
@@ -430,60 +431,6 @@ root_agent = SequentialAgent(
 )
 
 
-def configure_agents_from_llm_config(llm_provider: str, llm_model_name: str, api_key: str, ollama_base_url: str = None):
-    """Configure underlying LLM model for all sub-agents using LiteLlm.
-    llm_provider: factory name, e.g., "openai", "gemini", or "ollama"
-    llm_model_name: model, e.g., "gpt-4o-mini", "gemini-2.0-flash", or "llama3.2"
-    api_key: provider API key (not used for Ollama)
-    ollama_base_url: base URL for Ollama (e.g., "http://localhost:11434")
-    """
-    if not llm_provider or not llm_model_name:
-        return
-    try:
-        if llm_provider.lower() == "ollama":
-            if not ollama_base_url:
-                print("No Ollama base URL provided")
-                return
-            # Ensure URL has protocol
-            base_url = ollama_base_url.strip()
-            if not base_url.startswith(('http://', 'https://')):
-                base_url = f"http://{base_url}"
-            # For Ollama, we need to set the base URL in the model card
-            # Try different formats for Ollama integration
-            model_card = f"ollama_chat/{llm_model_name}"
-            print(f"Configuring Ollama model: {model_card} with base_url: {base_url}")
-            try:
-                # Try with api_base parameter
-                model = LiteLlm(model_card, api_key="ollama", api_base=base_url)
-                print(f"Ollama model configured successfully: {model_card}")
-            except Exception as e:
-                print(f"Failed to configure Ollama model with api_base: {e}")
-                try:
-                    # Try alternative format without api_base
-                    model = LiteLlm(model_card, api_key="ollama")
-                    print(f"Ollama model configured without api_base: {model_card}")
-                except Exception as e2:
-                    print(f"Failed to configure Ollama model without api_base: {e2}")
-                    try:
-                        # Try with different model card format
-                        alt_model_card = f"ollama_chat/{llm_model_name}"
-                        model = LiteLlm(alt_model_card)
-                        print(f"Ollama model configured with alternative format: {alt_model_card}")
-                    except Exception as e3:
-                        print(f"Failed to configure Ollama model with alternative format: {e3}")
-                        return
-        else:
-            if not api_key:
-                return
-            model_card = f"{str(llm_provider).lower()}/{llm_model_name}"
-            model = LiteLlm(model_card, api_key=api_key)
-        extract_JD_skills_agent.model = model
-        extract_resume_skills_agent.model = model
-        analyze_agent.model = model
-    except Exception:
-        # Silently ignore configuration errors; agents will fall back to defaults
-        pass
-
 def remove_json_fence(text):
     if text.startswith("```json"):
         text = text[len("```json"):].lstrip()
@@ -541,6 +488,77 @@ def compute_relevant_score(jd: Dict, cv: Dict) -> Dict[str, float]:
         "score": round(score, 4)
     }
 
+@lru_cache(maxsize=32)
+def _scoring_model(llm_provider: str = None, llm_model_name: str = None, api_key: str = None, ollama_base_url: str = None) -> LiteLlm:
+    """Build the LiteLlm model for a provider config.
+    Cached so every CV scored with the same settings (e.g. all CVs of one HR match) reuses one model object.
+    """
+    if llm_provider and llm_model_name:
+        if llm_provider.lower() == "ollama":
+            if ollama_base_url:
+                # Ensure URL has protocol
+                base_url = ollama_base_url.strip()
+                if not base_url.startswith(('http://', 'https://')):
+                    base_url = f"http://{base_url}"
+                model_card = f"ollama_chat/{llm_model_name}"
+                print(f"Creating Ollama model: {model_card} with base_url: {base_url}")
+                try:
+                    # Try with api_base parameter
+                    model = LiteLlm(model_card, api_key="ollama", api_base=base_url, temperature=0.0, top_p=1.0)
+                    print(f"Ollama model created successfully: {model_card}")
+                except Exception as e:
+                    print(f"Failed to create Ollama model with api_base: {e}")
+                    try:
+                        # Try alternative format without api_base
+                        model = LiteLlm(model_card, api_key="ollama", temperature=0.0, top_p=1.0)
+                        print(f"Ollama model created without api_base: {model_card}")
+                    except Exception as e2:
+                        print(f"Failed to create Ollama model without api_base: {e2}")
+                        try:
+                            # Try with different model card format
+                            alt_model_card = f"ollama_chat/{llm_model_name}"
+                            model = LiteLlm(alt_model_card, temperature=0.0, top_p=1.0)
+                            print(f"Ollama model created with alternative format: {alt_model_card}")
+                        except Exception as e3:
+                            print(f"Failed to create Ollama model with alternative format: {e3}")
+                            # Fallback to default
+                            model = LiteLlm("gemini/gemini-2.0-flash", temperature=0.0, top_p=1.0)
+            else:
+                print("No Ollama base URL provided, using fallback")
+                # Fallback default to avoid missing model errors
+                model = LiteLlm("gemini/gemini-2.0-flash", temperature=0.0, top_p=1.0)
+        elif api_key:
+            model_card = f"{str(llm_provider).lower()}/{llm_model_name}"
+            print(f"Creating model: {model_card}")
+            model = LiteLlm(model_card, api_key=api_key, temperature=0.0, top_p=1.0)
+        else:
+            print("No API key provided, using fallback")
+            # Fallback default to avoid missing model errors
+            model = LiteLlm("gemini/gemini-2.0-flash", temperature=0.0, top_p=1.0)
+    else:
+        print("No provider or model name, using fallback")
+        # Fallback default to avoid missing model errors
+        model = LiteLlm("gemini/gemini-2.0-flash", temperature=0.0, top_p=1.0)
+    return model
+
+
+def _with_model(agent: LlmAgent, model: LiteLlm) -> LlmAgent:
+    # A fresh agent per model; the module-level agents are shared and must never have .model reassigned
+    return LlmAgent(name=agent.name, instruction=agent.instruction, output_key=agent.output_key, model=model)
+
+
+@lru_cache(maxsize=32)
+def _scoring_root_agent(llm_provider: str = None, llm_model_name: str = None, api_key: str = None, ollama_base_url: str = None) -> SequentialAgent:
+    """Agent pipeline bound to one provider config (cached like _scoring_model).
+    Concurrent runs for different users each get their own agents, so none can switch another run's model or key.
+    """
+    model = _scoring_model(llm_provider, llm_model_name, api_key, ollama_base_url)
+    return SequentialAgent(
+        name=root_agent.name,
+        sub_agents=[_with_model(agent, model) for agent in (extract_JD_skills_agent, extract_resume_skills_agent, analyze_agent)]
+    )
+
+
 async def run_resume_scoring_agent(cv_info, jd_info, llm_provider: str = None, llm_model_name: str = None, api_key: str = None, ollama_base_url: str = None):
     """Run the structured extraction agents and compute the relevance score.
     If llm_provider, llm_model_name, and api_key/ollama_base_url are provided, set the model immediately.
@@ -574,61 +592,13 @@ async def run_resume_scoring_agent(cv_info, jd_info, llm_provider: str = None, l
                 os.environ.setdefault("LITELLM_SDK_LOGGING", "false")
             except Exception:
                 pass
-            # Create model
-            if llm_provider and llm_model_name:
-                if llm_provider.lower() == "ollama":
-                    if ollama_base_url:
-                        # Ensure URL has protocol
-                        base_url = ollama_base_url.strip()
-                        if not base_url.startswith(('http://', 'https://')):
-                            base_url = f"http://{base_url}"
-                        model_card = f"ollama_chat/{llm_model_name}"
-                        print(f"Creating Ollama model: {model_card} with base_url: {base_url}")
-                        try:
-                            # Try with api_base parameter
-                            model = LiteLlm(model_card, api_key="ollama", api_base=base_url, temperature=0.0, top_p=1.0)
-                            print(f"Ollama model created successfully: {model_card}")
-                        except Exception as e:
-                            print(f"Failed to create Ollama model with api_base: {e}")
-                            try:
-                                # Try alternative format without api_base
-                                model = LiteLlm(model_card, api_key="ollama", temperature=0.0, top_p=1.0)
-                                print(f"Ollama model created without api_base: {model_card}")
-                            except Exception as e2:
-                                print(f"Failed to create Ollama model without api_base: {e2}")
-                                try:
-                                    # Try with different model card format
-                                    alt_model_card = f"ollama_chat/{llm_model_name}"
-                                    model = LiteLlm(alt_model_card, temperature=0.0, top_p=1.0)
-                                    print(f"Ollama model created with alternative format: {alt_model_card}")
-                                except Exception as e3:
-                                    print(f"Failed to create Ollama model with alternative format: {e3}")
-                                    # Fallback to default
-                                    model = LiteLlm("gemini/gemini-2.0-flash", temperature=0.0, top_p=1.0)
-                    else:
-                        print("No Ollama base URL provided, using fallback")
-                        # Fallback default to avoid missing model errors
-                        model = LiteLlm("gemini/gemini-2.0-flash", temperature=0.0, top_p=1.0)
-                elif api_key:
-                    model_card = f"{str(llm_provider).lower()}/{llm_model_name}"
-                    print(f"Creating model: {model_card}")
-                    model = LiteLlm(model_card, api_key=api_key, temperature=0.0, top_p=1.0)
-                else:
-                    print("No API key provided, using fallback")
-                    # Fallback default to avoid missing model errors
-                    model = LiteLlm("gemini/gemini-2.0-flash", temperature=0.0, top_p=1.0)
-            else:
-                print("No provider or model name, using fallback")
-                # Fallback default to avoid missing model errors
-                model = LiteLlm("gemini/gemini-2.0-flash", temperature=0.0, top_p=1.0)
-            extract_JD_skills_agent.model = model
-            extract_resume_skills_agent.model = model
-            analyze_agent.model = model
+            # Create (or reuse) the agents for these settings
+            agent = _scoring_root_agent(llm_provider, llm_model_name, api_key, ollama_base_url)
         except Exception:
-            pass
+            agent = root_agent
         # Create session asynchronously
         session = await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
-        runner = Runner(agent=root_agent, app_name=APP_NAME, session_service=session_service)
+        runner = Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
         content = types.Content(role='user', parts=[types.Part(text="CV: " + cv_info + "\nJD: " + jd_info)])
         # Run the agent asynchronously with the existing session (which now contains history)
         jd_response = ""
@@ -1,6 +1,7 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+import aiohttp
 
 from .db import get_db_session
 from .models import User
@@ -14,6 +15,11 @@ def get_db(dep: Session = Depends(get_db_session)):
     return dep
 
 
+def get_http_client(request: Request) -> aiohttp.ClientSession:
+    # Shared outbound client created in the app lifespan (see main.create_app)
+    return request.app.state.http
+
+
 def get_current_user(
     creds: HTTPAuthorizationCredentials = Depends(auth_scheme),
     db: Session = Depends(get_db),
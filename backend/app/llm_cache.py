@@ -0,0 +1,56 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+def make_cache_key(*parts: Optional[str]) -> str:
+    """Hash the given parts (provider, model, prompt inputs, ...) into a fixed-size cache key."""
+    joined = "\x1e".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+class AsyncLRUCache:
+    """In-process LRU cache for coroutine results.
+
+    Concurrent lookups of the same key share one in-flight call, so duplicate
+    rows evaluated in parallel only hit the LLM once. Exceptions are never cached.
+    """
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._values: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        if key in self._values:
+            self._values.move_to_end(key)
+            return self._values[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done, cacheable))
+        # shield so one cancelled waiter does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future, cacheable: Callable[[Any], bool]) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        value = task.result()
+        if self.maxsize <= 0 or not cacheable(value):
+            return
+        self._values[key] = value
+        self._values.move_to_end(key)
+        while len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+
+    def clear(self) -> None:
+        self._values.clear()
@@ -1,3 +1,10 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import aiohttp
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -5,6 +12,7 @@ from .config import settings
 from sqlalchemy import text
 from dotenv import load_dotenv
 from .db import Base, engine
+from .text_extract import shutdown_extract_pool
 from .routers_auth import router as auth_router
 from .routers_cv import router as cv_router
 from .routers_match import router as match_router, router_matching
@@ -14,6 +22,47 @@ from .routers_llm import router as llm_router
 from .routers_evaluation import router as evaluation_router
 
 
+async def _prewarm_llm_connections(http: aiohttp.ClientSession) -> None:
+    """HEAD each hosted LLM API once so a pooled, already-handshaken connection is waiting for the first call"""
+    urls = (
+        os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1/chat/completions"),
+        "https://generativelanguage.googleapis.com/v1beta/models",
+    )
+
+    async def touch(url: str) -> None:
+        # Any status will do (these answer 401/404 without a key); only the connection matters
+        async with http.head(url, timeout=aiohttp.ClientTimeout(total=3)):
+            pass
+
+    results = await asyncio.gather(*(touch(url) for url in urls), return_exceptions=True)
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            print(f"LLM connection prewarm failed for {url}: {result!r}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Blocking MinIO/Tika/Presidio calls run in threads; size both pools (asyncio.to_thread and sync endpoints) for fan-out
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=settings.thread_pool_size))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.thread_pool_size
+    # One pooled HTTP session for outbound LLM calls, so connections and TLS sessions are reused across requests.
+    # aiohttp keeps scaling at hundreds of concurrent requests where httpx's pool becomes the bottleneck.
+    # keepalive_timeout is raised from aiohttp's 15s default so idle (and prewarmed) connections stay reusable
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=2000, limit_per_host=1000, ttl_dns_cache=300, keepalive_timeout=120),
+        timeout=aiohttp.ClientTimeout(total=60, sock_connect=5),
+    )
+    # Runs in the background so startup never waits on (or fails because of) the network
+    prewarm = asyncio.create_task(_prewarm_llm_connections(app.state.http)) if settings.prewarm_llm_connections else None
+    try:
+        yield
+    finally:
+        if prewarm is not None:
+            prewarm.cancel()
+        await app.state.http.close()
+        shutdown_extract_pool()
+
+
 def create_app() -> FastAPI:
     load_dotenv()
     Base.metadata.create_all(bind=engine)
@@ -46,12 +95,83 @@ def create_app() -> FastAPI:
                     """
                 )
             )
+            conn.execute(
+                text(
+                    """
+                    ALTER TABLE llm_configs
+                    ADD COLUMN IF NOT EXISTS llm_request_timeout DOUBLE PRECISION NOT NULL DEFAULT 15
+                    """
+                )
+            )
+            conn.commit()
+
+            # parsed_metadata used to be a JSON string in a TEXT column; convert it to JSONB in place
+            try:
+                conn.execute(
+                    text(
+                        """
+                        DO $$
+                        BEGIN
+                            IF EXISTS (
+                                SELECT 1 FROM information_schema.columns
+                                WHERE table_name = 'cvs' AND column_name = 'parsed_metadata' AND data_type = 'text'
+                            ) THEN
+                                ALTER TABLE cvs
+                                ALTER COLUMN parsed_metadata TYPE JSONB
+                                USING NULLIF(parsed_metadata, '')::jsonb;
+                            END IF;
+                        END $$;
+                        """
+                    )
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+
+            # Let Postgres detach CVs when their collection is deleted (ON DELETE SET NULL)
+            try:
+                conn.execute(
+                    text(
+                        """
+                        DO $$
+                        DECLARE r record;
+                        BEGIN
+                            FOR r IN
+                                SELECT c.conname FROM pg_constraint c
+                                JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY(c.conkey)
+                                WHERE c.conrelid = 'cvs'::regclass AND c.contype = 'f'
+                                  AND a.attname = 'collection_id' AND c.confdeltype <> 'n'
+                            LOOP
+                                EXECUTE format('ALTER TABLE cvs DROP CONSTRAINT %I', r.conname);
+                                EXECUTE format(
+                                    'ALTER TABLE cvs ADD CONSTRAINT %I FOREIGN KEY (collection_id) '
+                                    'REFERENCES cv_collections(id) ON DELETE SET NULL',
+                                    r.conname
+                                );
+                            END LOOP;
+                        END $$;
+                        """
+                    )
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+
+            # create_all does not add new indexes to tables that already exist
+            conn.execute(
+                text(
+                    """
+                    CREATE INDEX IF NOT EXISTS ix_cvs_owner_id_created_at
+                    ON cvs (owner_id, created_at DESC)
+                    """
+                )
+            )
             conn.commit()
     except Exception:
         # Do not block app startup on migration errors
         pass
 
-    app = FastAPI(title="CV Match API")
+    app = FastAPI(title="CV Match API", lifespan=lifespan)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=[origin.strip() for origin in settings.cors_origins.split(",")],
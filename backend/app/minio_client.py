@@ -16,3 +16,16 @@ def get_minio_client() -> Minio:
         client.make_bucket(settings.minio_bucket)
     return client
 
+
+
+def get_minio_presign_client() -> Minio:
+    """Client for signing browser download URLs: the URL's host must be one the browser can reach.
+    Signing is done locally; with the region set the client never contacts the public endpoint.
+    """
+    return Minio(
+        settings.minio_public_endpoint,
+        access_key=settings.minio_access_key,
+        secret_key=settings.minio_secret_key,
+        secure=settings.minio_public_secure,
+        region=settings.minio_region,
+    )
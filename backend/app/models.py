@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Text, Float, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -36,7 +37,7 @@ class CVCollection(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     owner = relationship("User", back_populates="cv_collections")
-    cvs = relationship("CV", back_populates="collection")
+    cvs = relationship("CV", back_populates="collection", passive_deletes=True)
 
 
 class CV(Base):
@@ -44,17 +45,22 @@ class CV(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    collection_id = Column(Integer, ForeignKey("cv_collections.id"), nullable=True, index=True)
+    collection_id = Column(Integer, ForeignKey("cv_collections.id", ondelete="SET NULL"), nullable=True, index=True)
     filename = Column(String(512), nullable=False)
     object_key = Column(String(1024), nullable=False)
     content_text = Column(Text, nullable=True)
     embedding_vector = Column(Text, nullable=True)  # JSON string
-    parsed_metadata = Column(Text, nullable=True)   # JSON string
+    parsed_metadata = Column(JSONB, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     owner = relationship("User", back_populates="cvs")
     collection = relationship("CVCollection", back_populates="cvs")
 
+    # Serves the per-owner CV list, which is filtered by owner and ordered newest first
+    __table_args__ = (
+        Index("ix_cvs_owner_id_created_at", owner_id, created_at.desc()),
+    )
+
 
 class LLMProvider(str, enum.Enum):
     openai = "openai"
@@ -80,6 +86,7 @@ class LLMConfig(Base):
     llm_temperature = Column(Float, nullable=False, default=0.2)
     llm_top_p = Column(Float, nullable=False, default=1.0)
     llm_max_tokens = Column(Integer, nullable=False, default=1024)
+    llm_request_timeout = Column(Float, nullable=False, default=15.0)  # seconds per attempt
     ollama_base_url = Column(String(512), nullable=True)
     # Embedding settings
     embedding_provider = Column(Enum(EmbeddingProvider), nullable=False, default=EmbeddingProvider.local)
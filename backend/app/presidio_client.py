@@ -1,15 +1,27 @@
+import hashlib
+import threading
 import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from .config import settings
 
 
+# Shared session so repeated analyzer/anonymizer calls reuse keep-alive connections
+_session = requests.Session()
+
+# Anonymized results by text digest; the same CV/JD is often anonymized again and again
+_anonymized_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_anonymized_cache_lock = threading.Lock()
+
+
 def analyze_pii(text: str, language: str = "en") -> List[Dict[str, Any]]:
     url = f"{settings.presidio_analyzer_url}/analyze"
     payload = {
         "text": text,
         "language": language
     }
-    resp = requests.post(url, json=payload, timeout=30)
+    resp = _session.post(url, json=payload, timeout=30)
     resp.raise_for_status()
     return resp.json() or []
 
@@ -20,7 +32,7 @@ def anonymize_text(text: str, analyzer_results: List[Dict[str, Any]]) -> str:
         "text": text,
         "analyzer_results": analyzer_results
     }
-    resp = requests.post(url, json=payload, timeout=30)
+    resp = _session.post(url, json=payload, timeout=30)
     resp.raise_for_status()
     data = resp.json()
     # API returns {"text": "anonymized"}
@@ -30,6 +42,35 @@ def anonymize_text(text: str, analyzer_results: List[Dict[str, Any]]) -> str:
 def analyze_and_anonymize(text: str, language: str = "en") -> str:
     if not text:
         return ""
+    key = hashlib.blake2b(f"{language}\x1e{text}".encode("utf-8"), digest_size=16).digest()
+    with _anonymized_cache_lock:
+        cached = _anonymized_cache.get(key)
+        if cached is not None:
+            _anonymized_cache.move_to_end(key)
+            return cached
+
     findings = analyze_pii(text, language=language)
-    return anonymize_text(text, findings)
+    anonymized = anonymize_text(text, findings)
+
+    if settings.anonymization_cache_size > 0:
+        with _anonymized_cache_lock:
+            _anonymized_cache[key] = anonymized
+            _anonymized_cache.move_to_end(key)
+            while len(_anonymized_cache) > settings.anonymization_cache_size:
+                _anonymized_cache.popitem(last=False)
+    return anonymized
+
 
+def analyze_and_anonymize_batch(texts: List[str], language: str = "en", max_workers: int = 8) -> List[str]:
+    """Anonymize many texts, returning results in input order.
+    Each distinct text is sent to Presidio once (a JD repeated across rows is only
+    analyzed a single time) and the unique texts are processed concurrently.
+    The NER work happens inside the Presidio services; here each call only waits on
+    HTTP, so threads (not processes) are the right way to fan out.
+    """
+    unique_texts = list(dict.fromkeys(text for text in texts if text))
+    if not unique_texts:
+        return ["" for _ in texts]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_texts))) as pool:
+        anonymized = dict(zip(unique_texts, pool.map(lambda text: analyze_and_anonymize(text, language=language), unique_texts)))
+    return [anonymized[text] if text else "" for text in texts]
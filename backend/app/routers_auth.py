@@ -1,30 +1,21 @@
 import os
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional
 
 from .deps import get_db, get_current_user
 from .models import User, UserRole
 from .schemas import UserCreate, UserLogin, UserOut, Token, ChangePassword
-from .security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from .security import (
+    create_access_token, hash_password, verify_password, verify_and_update_password,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
 from .minio_client import get_minio_client
 from .config import settings
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-
 @router.post("/register", response_model=UserOut)
 def register(user: UserCreate, db: Session = Depends(get_db)):
     # Check if user already exists
@@ -33,7 +24,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = hash_password(user.password)
     db_user = User(
         email=user.email,
         password_hash=hashed_password,
@@ -50,12 +41,17 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
 def login(payload: UserLogin, db: Session = Depends(get_db)):
     # Find user by email
     user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+    verified, new_hash = verify_and_update_password(payload.password, user.password_hash) if user else (False, None)
+    if not verified:
         raise HTTPException(
             status_code=401,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Stored hash used an old scheme/cost (e.g. bcrypt); replace it while we have the password
+        user.password_hash = new_hash
+        db.commit()
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -84,7 +80,7 @@ def change_password(
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Hash new password
-    new_password_hash = get_password_hash(password_data.new_password)
+    new_password_hash = hash_password(password_data.new_password)
     
     # Update password
     current_user.password_hash = new_password_hash
@@ -1,30 +1,64 @@
-import os
-import tempfile
-import json
+import base64
+import urllib.parse
+import uuid
 from io import BytesIO
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+import orjson
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from minio.error import S3Error
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import Text, cast, func, insert
 from typing import List
-import base64
+from datetime import timedelta
 
 from .deps import get_db, get_current_user
 from .models import CV, User, UserRole, CVCollection
 from .schemas import (
-    CVUploadResponse, CVListResponse, CVListItem,
-    CVCollectionCreate, CVCollectionUpdate, CVCollectionItem,
+    CVUploadResponse, CVListResponse,
+    CVCollectionCreate, CVCollectionItem,
     CVCollectionListResponse, CVCollectionDetailResponse
 )
-from .minio_client import get_minio_client
+from .minio_client import get_minio_client, get_minio_presign_client
 from .config import settings
-from .text_extract import sniff_and_extract_text
+from .text_extract import CONTENT_TYPE_MAP, file_extension
 from .tika_client import extract_text_via_tika
 from .presidio_client import analyze_and_anonymize
 
 
+router = APIRouter(prefix="/cv", tags=["cv"])
 
+# Lifetime of presigned MinIO download links handed to the browser
+PRESIGNED_URL_EXPIRY = timedelta(minutes=5)
+
+
+def _cv_list_items(query) -> list:
+    """CVListItem-shaped dicts for the CVs matched by query.
+
+    Only the list columns are selected (content_text can be very large). Postgres renders parsed_metadata to JSON text itself and it is embedded as a raw
+    fragment, so the metadata is never decoded into dicts only to be re-encoded.
+    """
+    rows = query.with_entities(
+        CV.id, CV.filename, CV.created_at, CV.collection_id, cast(CV.parsed_metadata, Text)
+    ).all()
+    return [
+        {
+            "id": cv_id,
+            "filename": filename,
+            "uploaded_at": created_at,
+            "parsed_metadata": orjson.Fragment(metadata) if metadata is not None else None,
+            "collection_id": collection_id,
+        }
+        for cv_id, filename, created_at, collection_id, metadata in rows
+    ]
+
+
+def _cv_object_key(user_id: int, filename: str) -> str:
+    # Unique per upload: same-named files (in one batch or re-uploaded) must not share one MinIO object
+    return f"user-{user_id}/{uuid.uuid4().hex}/{filename}"
 
-router = APIRouter(prefix="/cv", tags=["cv"])
+
+def _json_response(content) -> Response:
+    return Response(content=orjson.dumps(content), media_type="application/json")
 
 
 # CV Collection endpoints
@@ -74,7 +108,7 @@ async def list_collections(
     result = []
     for collection in collections:
         cv_count = db.query(CV).filter(CV.collection_id == collection.id).count()
-        result.append(CVCollectionItem(
+        result.append(CVCollectionItem.model_construct(
             id=collection.id,
             name=collection.name,
             description=collection.description,
@@ -83,7 +117,7 @@ async def list_collections(
             cv_count=cv_count
         ))
     
-    return CVCollectionListResponse(collections=result)
+    return CVCollectionListResponse.model_construct(collections=result)
 
 
 @router.get("/collections/{collection_id}", response_model=CVCollectionDetailResponse)
@@ -104,33 +138,16 @@ async def get_collection(
             detail="Collection not found"
         )
     
-    cvs = db.query(CV).filter(CV.collection_id == collection_id).all()
+    cv_list = _cv_list_items(db.query(CV).filter(CV.collection_id == collection_id))
     
-    cv_list = []
-    for cv in cvs:
-        parsed_metadata = None
-        if cv.parsed_metadata:
-            try:
-                parsed_metadata = json.loads(cv.parsed_metadata)
-            except json.JSONDecodeError:
-                parsed_metadata = {}
-        
-        cv_list.append(CVListItem(
-            id=cv.id,
-            filename=cv.filename,
-            uploaded_at=cv.created_at,
-            parsed_metadata=parsed_metadata,
-            collection_id=cv.collection_id
-        ))
-    
-    return CVCollectionDetailResponse(
-        id=collection.id,
-        name=collection.name,
-        description=collection.description,
-        created_at=collection.created_at,
-        updated_at=collection.updated_at,
-        cvs=cv_list
-    )
+    return _json_response({
+        "id": collection.id,
+        "name": collection.name,
+        "description": collection.description,
+        "created_at": collection.created_at,
+        "updated_at": collection.updated_at,
+        "cvs": cv_list,
+    })
 
 
 @router.put("/collections/{collection_id}")
@@ -179,11 +196,7 @@ async def delete_collection(
             detail="Collection not found"
         )
     
-    # Remove collection_id from all CVs in this collection
-    db.query(CV).filter(CV.collection_id == collection_id).update({
-        CV.collection_id: None
-    })
-    
+    # CVs are detached by the ON DELETE SET NULL foreign key on cvs.collection_id
     db.delete(collection)
     db.commit()
     
@@ -276,7 +289,7 @@ def upload_cv(
     content = file.file.read()
 
     client = get_minio_client()
-    object_key = f"user-{user.id}/{file.filename}"
+    object_key = _cv_object_key(user.id, file.filename)
     # Upload file bytes to MinIO
     client.put_object(
         bucket_name=settings.minio_bucket,
@@ -294,14 +307,84 @@ def upload_cv(
         collection_id=collection_id
     )
     db.add(cv)
+    # flush assigns the id and created_at is filled client-side, so no refresh is needed
+    db.flush()
+    response = CVUploadResponse.model_validate(cv)
     db.commit()
-    db.refresh(cv)
-    return cv
+    return response
+
+
+@router.post("/bulk-upload", response_model=List[CVUploadResponse])
+def bulk_upload_cvs(
+    files: List[UploadFile] = File(...),
+    collection_id: int = Form(None),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    if user.role != UserRole.hr:
+        raise HTTPException(status_code=403, detail="Only HR can upload and store CVs")
+
+    if collection_id is not None:
+        collection = db.query(CVCollection).filter(
+            CVCollection.id == collection_id,
+            CVCollection.owner_id == user.id
+        ).first()
+        if not collection:
+            raise HTTPException(status_code=404, detail="CV collection not found")
+
+    client = get_minio_client()
+    rows = []
+    for file in files:
+        content = file.file.read()
+        object_key = _cv_object_key(user.id, file.filename)
+        client.put_object(
+            bucket_name=settings.minio_bucket,
+            object_name=object_key,
+            data=BytesIO(content),
+            length=len(content),
+            content_type=file.content_type or "application/octet-stream",
+        )
+        rows.append({
+            "owner_id": user.id,
+            "filename": file.filename,
+            "object_key": object_key,
+            "content_text": None,
+            "collection_id": collection_id,
+        })
+
+    try:
+        # One multi-row INSERT ... RETURNING instead of a commit + refresh per file
+        inserted = db.execute(
+            insert(CV).returning(CV.id, CV.created_at, sort_by_parameter_order=True),
+            rows
+        ).all()
+        db.commit()
+    except Exception:
+        db.rollback()
+        # No row references the stored objects; remove them rather than leave them orphaned in MinIO
+        for row in rows:
+            try:
+                client.remove_object(bucket_name=settings.minio_bucket, object_name=row["object_key"])
+            except Exception as e:
+                print(f"Failed to delete from MinIO: {row['object_key']}, error: {e}")
+        raise
+
+    return [
+        CVUploadResponse(
+            id=cv_id,
+            filename=row["filename"],
+            object_key=row["object_key"],
+            created_at=created_at
+        )
+        for (cv_id, created_at), row in zip(inserted, rows)
+    ]
 
 
 @router.get("/list", response_model=CVListResponse)
 def list_cvs(
     collection_id: int = None,
+    limit: int = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
@@ -313,27 +396,14 @@ def list_cvs(
     if collection_id is not None:
         query = query.filter(CV.collection_id == collection_id)
     
-    cvs = query.order_by(CV.created_at.desc()).all()
-    cv_items = []
-    for cv in cvs:
-        # Parse JSON metadata if exists
-        parsed_metadata = None
-        if cv.parsed_metadata:
-            try:
-                import json
-                parsed_metadata = json.loads(cv.parsed_metadata)
-            except (json.JSONDecodeError, TypeError):
-                parsed_metadata = None
-        
-        cv_items.append(CVListItem(
-            id=cv.id,
-            filename=cv.filename,
-            uploaded_at=cv.created_at,
-            parsed_metadata=parsed_metadata,
-            collection_id=cv.collection_id
-        ))
+    # Count in the database so the total reflects every matching row, not just this page
+    total = query.with_entities(func.count(CV.id)).scalar()
+    
+    query = query.order_by(CV.created_at.desc()).offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
     
-    return CVListResponse(cvs=cv_items, total=len(cv_items))
+    return _json_response({"cvs": _cv_list_items(query), "total": total})
 
 
 @router.delete("/{cv_id}")
@@ -378,21 +448,12 @@ def get_cv_content(
     if not cv:
         raise HTTPException(status_code=404, detail="CV not found")
     
-    # Parse JSON metadata if exists
-    parsed_metadata = None
-    if cv.parsed_metadata:
-        try:
-            import json
-            parsed_metadata = json.loads(cv.parsed_metadata)
-        except (json.JSONDecodeError, TypeError):
-            parsed_metadata = None
-    
     return {
         "id": cv.id,
         "filename": cv.filename,
         "content": cv.content_text,
         "created_at": cv.created_at.isoformat(),
-        "parsed_metadata": parsed_metadata
+        "parsed_metadata": cv.parsed_metadata
     }
 
 
@@ -413,20 +474,17 @@ def get_cv_content_anonymized(
         try:
             client = get_minio_client()
             file_obj = client.get_object(bucket_name=settings.minio_bucket, object_name=cv.object_key)
-            file_bytes = file_obj.read()
 
             # Best-effort content-type by extension
-            file_ext = (cv.filename or "").lower().split(".")[-1]
-            content_type_map = {
-                'pdf': 'application/pdf',
-                'doc': 'application/msword',
-                'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'txt': 'text/plain',
-                'rtf': 'application/rtf'
-            }
-            content_type = content_type_map.get(file_ext)
+            file_ext = file_extension(cv.filename)
+            content_type = CONTENT_TYPE_MAP.get(file_ext)
 
-            extracted_text = extract_text_via_tika(file_bytes, content_type, cv.filename)
+            # Stream the object straight into Tika rather than reading it into memory first
+            try:
+                extracted_text = extract_text_via_tika(file_obj.stream(amt=1 << 16), content_type, cv.filename)
+            finally:
+                file_obj.close()
+                file_obj.release_conn()
             text = (extracted_text or "").strip()
 
             # Cache back to DB for future requests
@@ -454,6 +512,29 @@ def get_cv_content_anonymized(
     }
 
 
+def _content_disposition(filename: str, disposition: str = "inline") -> str:
+    # ASCII-safe fallback plus RFC 5987 filename* for non-ASCII names
+    ascii_filename = filename.encode('utf-8', errors='ignore').decode('ascii', errors='ignore') or 'file'
+    quoted_utf8 = urllib.parse.quote(filename)
+    return f"{disposition}; filename={ascii_filename}; filename*=UTF-8''{quoted_utf8}"
+
+
+def _iter_object(response, chunk_size: int = 1 << 16):
+    """Yield a MinIO object in chunks, handing the connection back to the pool once done"""
+    try:
+        yield from response.stream(amt=chunk_size)
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def _storage_error(e: Exception, detail: str) -> HTTPException:
+    # A missing object (S3 NoSuchKey) is a 404; anything else is a storage failure
+    if (isinstance(e, S3Error) and e.code == "NoSuchKey") or "does not exist" in str(e):
+        return HTTPException(status_code=404, detail="File not found in storage")
+    return HTTPException(status_code=500, detail=detail)
+
+
 @router.get("/{cv_id}/file")
 def get_cv_file(
     cv_id: int,
@@ -463,49 +544,70 @@ def get_cv_file(
     if user.role != UserRole.hr:
         raise HTTPException(status_code=403, detail="Only HR can view CV files")
     
-    cv = db.query(CV).filter(CV.id == cv_id, CV.owner_id == user.id).first()
+    cv = db.query(CV).options(load_only(CV.id, CV.filename, CV.object_key)).filter(
+        CV.id == cv_id, CV.owner_id == user.id
+    ).first()
     if not cv:
         raise HTTPException(status_code=404, detail="CV not found")
     
     try:
-        client = get_minio_client()
-        # Get file from MinIO
-        file_data = client.get_object(bucket_name=settings.minio_bucket, object_name=cv.object_key)
-        
-        # Determine content type based on file extension
-        file_ext = cv.filename.lower().split('.')[-1]
-        content_type_map = {
-            'pdf': 'application/pdf',
-            'doc': 'application/msword',
-            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            'txt': 'text/plain',
-            'rtf': 'application/rtf'
+        # A missing object fails here with NoSuchKey, before any body is read
+        file_data = get_minio_client().get_object(bucket_name=settings.minio_bucket, object_name=cv.object_key)
+    except Exception as e:
+        print(f"Error serving file: {e}")
+        raise _storage_error(e, "Failed to serve file")
+    
+    # Determine content type based on file extension
+    content_type = CONTENT_TYPE_MAP.get(file_extension(cv.filename), 'application/octet-stream')
+    # Stream the body through instead of buffering the whole file
+    return StreamingResponse(
+        _iter_object(file_data),
+        media_type=content_type,
+        headers={
+            "Content-Disposition": _content_disposition(cv.filename),
+            "Cache-Control": "no-cache"
         }
-        content_type = content_type_map.get(file_ext, 'application/octet-stream')
-        
-        # Read file data
-        file_bytes = file_data.read()
-        
-        # Prepare Content-Disposition with ASCII-safe fallback and RFC 5987 filename*
-        import urllib.parse
-        ascii_filename = cv.filename.encode('utf-8', errors='ignore').decode('ascii', errors='ignore') or 'file'
-        quoted_utf8 = urllib.parse.quote(cv.filename)
-        content_disposition = f"inline; filename={ascii_filename}; filename*=UTF-8''{quoted_utf8}"
-        return Response(
-            content=file_bytes,
-            media_type=content_type,
-            headers={
-                "Content-Disposition": content_disposition,
-                "Cache-Control": "no-cache"
-            }
+    )
+
+
+@router.get("/{cv_id}/file-url")
+def get_cv_file_url(
+    cv_id: int,
+    download: bool = Query(False),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Return a short-lived presigned URL so the browser can fetch the file straight from MinIO"""
+    if user.role != UserRole.hr:
+        raise HTTPException(status_code=403, detail="Only HR can view CV files")
+    
+    cv = db.query(CV).options(load_only(CV.id, CV.filename, CV.object_key)).filter(
+        CV.id == cv_id, CV.owner_id == user.id
+    ).first()
+    if not cv:
+        raise HTTPException(status_code=404, detail="CV not found")
+    
+    try:
+        # HEAD only: a presigned URL for a missing object would just 404 in the browser
+        get_minio_client().stat_object(bucket_name=settings.minio_bucket, object_name=cv.object_key)
+        url = get_minio_presign_client().presigned_get_object(
+            bucket_name=settings.minio_bucket,
+            object_name=cv.object_key,
+            expires=PRESIGNED_URL_EXPIRY,
+            response_headers={
+                "response-content-type": CONTENT_TYPE_MAP.get(file_extension(cv.filename), 'application/octet-stream'),
+                "response-content-disposition": _content_disposition(cv.filename, "attachment" if download else "inline"),
+            },
         )
-        
     except Exception as e:
-        print(f"Error serving file: {e}")
-        # Check if it's a NoSuchKey error (file doesn't exist in MinIO)
-        if "NoSuchKey" in str(e) or "does not exist" in str(e):
-            raise HTTPException(status_code=404, detail="File not found in storage")
-        raise HTTPException(status_code=500, detail="Failed to serve file")
+        print(f"Error generating file URL: {e}")
+        raise _storage_error(e, "Failed to generate file URL")
+    
+    return {
+        "url": url,
+        "filename": cv.filename,
+        "expires_in": int(PRESIGNED_URL_EXPIRY.total_seconds())
+    }
 
 
 @router.get("/{cv_id}/view")
@@ -514,69 +616,41 @@ def view_cv_file(
     db: Session = Depends(get_db),
 ):
     # Less secure endpoint for iframe viewing
-    cv = db.query(CV).filter(CV.id == cv_id).first()
+    cv = db.query(CV).options(load_only(CV.id, CV.filename, CV.object_key)).filter(CV.id == cv_id).first()
     if not cv:
         raise HTTPException(status_code=404, detail="CV not found")
     
     try:
-        client = get_minio_client()
-        # Get file from MinIO
-        file_data = client.get_object(bucket_name=settings.minio_bucket, object_name=cv.object_key)
-        
-        # Determine content type based on file extension
-        file_ext = cv.filename.lower().split('.')[-1]
-        content_type_map = {
-            'pdf': 'application/pdf',
-            'doc': 'application/msword',
-            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            'txt': 'text/plain',
-            'rtf': 'application/rtf'
-        }
-        content_type = content_type_map.get(file_ext, 'application/octet-stream')
-        
-        # Read file data
+        # A missing object fails here with NoSuchKey, before any body is read
+        file_data = get_minio_client().get_object(bucket_name=settings.minio_bucket, object_name=cv.object_key)
+    except Exception as e:
+        print(f"Error serving file: {e}")
+        raise _storage_error(e, "Failed to serve file")
+    
+    # Determine content type based on file extension
+    file_ext = file_extension(cv.filename)
+    content_type = CONTENT_TYPE_MAP.get(file_ext, 'application/octet-stream')
+    
+    # For PDF files, stream inline
+    if file_ext == 'pdf':
+        return StreamingResponse(
+            _iter_object(file_data),
+            media_type=content_type,
+            headers={
+                "Content-Disposition": _content_disposition(cv.filename),
+                "Cache-Control": "no-cache"
+            }
+        )
+    
+    # For other files, return base64 encoded data
+    try:
         file_bytes = file_data.read()
-        
-        # For PDF files, return as inline
-        if file_ext == 'pdf':
-            # Prepare Content-Disposition with ASCII-safe fallback and RFC 5987 filename*
-            import urllib.parse
-            ascii_filename = cv.filename.encode('utf-8', errors='ignore').decode('ascii', errors='ignore') or 'file'
-            quoted_utf8 = urllib.parse.quote(cv.filename)
-            content_disposition = f"inline; filename={ascii_filename}; filename*=UTF-8''{quoted_utf8}"
-            return Response(
-                content=file_bytes,
-                media_type=content_type,
-                headers={
-                    "Content-Disposition": content_disposition,
-                    "Cache-Control": "no-cache"
-                }
-            )
-        else:
-            # For other files, return base64 encoded data
-            import base64
-            encoded_data = base64.b64encode(file_bytes).decode('utf-8')
-            data_url = f"data:{content_type};base64,{encoded_data}"
-            return {"data_url": data_url, "filename": cv.filename, "content_type": content_type}
-        
     except Exception as e:
         print(f"Error serving file: {e}")
-        # Check if it's a NoSuchKey error (file doesn't exist in MinIO)
-        if "NoSuchKey" in str(e) or "does not exist" in str(e):
-            raise HTTPException(status_code=404, detail="File not found in storage")
         raise HTTPException(status_code=500, detail="Failed to serve file")
-
-
-class UploadFileSpooled:
-    def __init__(self, upload_file: UploadFile, raw_bytes: bytes):
-        self._bytes = raw_bytes
-        self._offset = 0
-
-    def read(self, size=-1):
-        if size == -1:
-            size = len(self._bytes) - self._offset
-        start = self._offset
-        end = min(len(self._bytes), self._offset + size)
-        self._offset = end
-        return self._bytes[start:end]
-
+    finally:
+        file_data.close()
+        file_data.release_conn()
+    encoded_data = base64.b64encode(file_bytes).decode('utf-8')
+    data_url = f"data:{content_type};base64,{encoded_data}"
+    return {"data_url": data_url, "filename": cv.filename, "content_type": content_type}
@@ -1,21 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Awaitable, AsyncIterator, BinaryIO, Callable, Iterator, Optional
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import openpyxl
+import xlrd
+import asyncio
+import csv
+import hashlib
 import io
 import json
-from collections import Counter
+import re
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass
+from functools import lru_cache
 
+from .config import settings
 from .deps import get_db, get_current_user
 from .models import User, LLMConfig
-from .scoring import compute_similarity_score
-from .presidio_client import analyze_and_anonymize
+from .presidio_client import analyze_and_anonymize_batch
+from .llm_cache import AsyncLRUCache, make_cache_key
+from .scoring import compute_similarity_score_detailed_async
 import openai
-import requests
-import json
+import httpx
+import tiktoken
 import google.generativeai as genai
 import logging
 import os
+import warnings
 
 # Suppress Google Cloud SDK warnings
 os.environ['GRPC_VERBOSITY'] = 'ERROR'
@@ -24,77 +44,102 @@ logging.getLogger('google').setLevel(logging.ERROR)
 
 router = APIRouter(prefix="/evaluation", tags=["evaluation"])
 
-async def call_llm_for_description_matching(cv_text: str, jd_text: str, label_rules: List[Dict], llm_config: LLMConfig) -> str:
+# Memoized description-matching labels shared across evaluation runs, keyed by model + credentials + inputs
+_prediction_cache = AsyncLRUCache(settings.llm_cache_size)
+
+# System instruction shared by every description-matching provider
+_LABEL_SYSTEM_PROMPT = "You are a precise HR analyst. Always respond with only the label name, nothing else."
+
+
+@dataclass(frozen=True, slots=True)
+class LLMConfigDTO:
     """
-    Call LLM to predict label based on CV, JD and label rules
-    Returns predicted label string
+    Plain snapshot of the fields an evaluation reads from the user's LLMConfig.
+    Detached from the session, so row coroutines never touch ORM attributes.
     """
-    # Create prompt template
-    prompt = f"""You are an expert HR analyst. Your task is to analyze a CV and Job Description (JD) and predict the most appropriate label based on the given rules.
-
-CV Text:
-{cv_text}
+    provider: str
+    model: str
+    api_key: Optional[str]
+    ollama_base_url: Optional[str]
 
-Job Description:
-{jd_text}
 
-Available Labels and Rules:
-"""
-    
-    for rule in label_rules:
-        prompt += f"- {rule['label']}: {rule['rule']}\n"
-    
-    prompt += """
-Instructions:
-1. Carefully analyze the CV and JD content
-2. Apply the rules for each label to determine the best match
-3. Return ONLY the predicted label name (exactly as written above)
-4. Do not include any explanation, reasoning, or additional text
-5. Ensure your response is consistent and deterministic
+def load_llm_config(db: Session, user_id: int) -> Optional[LLMConfigDTO]:
+    """
+    Fetch the user's LLM settings in one query and copy them into an LLMConfigDTO
+    """
+    llm_config = db.query(LLMConfig).filter(LLMConfig.user_id == user_id).first()
+    if not llm_config:
+        return None
+    return LLMConfigDTO(
+        provider=str(getattr(llm_config.llm_provider, 'value', llm_config.llm_provider)),
+        model=llm_config.llm_model_name,
+        api_key=llm_config.llm_api_key,
+        ollama_base_url=llm_config.ollama_base_url,
+    )
 
-Predicted Label:"""
 
-    try:
-        if llm_config.llm_provider.value == "openai" and llm_config.llm_api_key:
-            # OpenAI API
-            client = openai.AsyncOpenAI(api_key=llm_config.llm_api_key)
+@asynccontextmanager
+async def open_llm_caller(llm_config: Optional[LLMConfigDTO]) -> AsyncIterator[Callable[[str], Awaitable[str]]]:
+    """
+    Build the provider client once for a whole evaluation and yield `async call(prompt) -> str`.
+    The provider branch is resolved here instead of on every row, and clients are closed on exit.
+    """
+    provider = llm_config.provider if llm_config else None
+    
+    if provider == "openai" and llm_config.api_key:
+        # OpenAI API
+        client = openai.AsyncOpenAI(api_key=llm_config.api_key)
+        model_name = llm_config.model
+        
+        async def call(prompt: str) -> str:
             response = await client.chat.completions.create(
-                model=llm_config.llm_model_name,
+                model=model_name,
                 messages=[
-                    {"role": "system", "content": "You are a precise HR analyst. Always respond with only the label name, nothing else."},
+                    {"role": "system", "content": _LABEL_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.0,  # Ensure consistency
                 max_tokens=50
             )
-            predicted_label = response.choices[0].message.content.strip()
-            
-        elif llm_config.llm_provider.value == "gemini" and llm_config.llm_api_key:
-            # Gemini API
-            import google.generativeai as genai
-            import warnings
-            
+            return response.choices[0].message.content.strip()
+        
+        try:
+            yield call
+        finally:
+            await client.close()
+    
+    elif provider == "gemini" and llm_config.api_key:
+        # Gemini API
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            genai.configure(api_key=llm_config.api_key)
+            model = genai.GenerativeModel(llm_config.model)
+        
+        async def call(prompt: str) -> str:
             # Suppress warnings for this call
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore")
-                genai.configure(api_key=llm_config.llm_api_key)
-                model = genai.GenerativeModel(llm_config.llm_model_name)
-                
-                full_prompt = f"System: You are a precise HR analyst. Always respond with only the label name, nothing else.\n\nUser: {prompt}"
+                full_prompt = f"System: {_LABEL_SYSTEM_PROMPT}\n\nUser: {prompt}"
                 response = await model.generate_content_async(full_prompt)
-                predicted_label = response.text.strip()
-            
-        elif llm_config.llm_provider.value == "ollama" and llm_config.ollama_base_url:
-            # Ollama API - Fix URL format
-            base_url = llm_config.ollama_base_url.rstrip('/')
-            if not base_url.startswith(('http://', 'https://')):
-                base_url = f"http://{base_url}"
-            ollama_url = f"{base_url}/api/chat"
-            
+            return response.text.strip()
+        
+        yield call
+    
+    elif provider == "ollama" and llm_config.ollama_base_url:
+        # Ollama API - Fix URL format
+        base_url = llm_config.ollama_base_url.rstrip('/')
+        if not base_url.startswith(('http://', 'https://')):
+            base_url = f"http://{base_url}"
+        ollama_url = f"{base_url}/api/chat"
+        model_name = llm_config.model
+        # Async client so concurrent rows don't block the event loop; pooled across the run
+        client = httpx.AsyncClient(timeout=30)
+        
+        async def call(prompt: str) -> str:
             payload = {
-                "model": llm_config.llm_model_name,
+                "model": model_name,
                 "messages": [
-                    {"role": "system", "content": "You are a precise HR analyst. Always respond with only the label name, nothing else."},
+                    {"role": "system", "content": _LABEL_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 "stream": False,
@@ -103,112 +148,667 @@ Predicted Label:"""
                     "top_p": 1.0
                 }
             }
-            
-            response = requests.post(ollama_url, json=payload, timeout=30)
+            response = await client.post(ollama_url, json=payload)
             response.raise_for_status()
             result = response.json()
-            predicted_label = result["message"]["content"].strip()
-            
-        else:
+            return result["message"]["content"].strip()
+        
+        try:
+            yield call
+        finally:
+            await client.aclose()
+    
+    else:
+        async def call(prompt: str) -> str:
             # No valid configuration
             raise Exception("No valid LLM configuration found")
+        
+        yield call
+
+
+# Share of the token budget kept from the start of a text; the rest comes from its end
+_CLIP_HEAD_RATIO = 0.8
+# Rough characters per token, used when no tokenizer is available
+_CHARS_PER_TOKEN = 4
+_CLIP_MARKER = "\n...\n"
+
+
+@lru_cache(maxsize=None)
+def _token_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """
+    tiktoken encoding for the model, or o200k_base for non-OpenAI models.
+    Returns None when the BPE files cannot be loaded (they are downloaded on first use).
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"Tokenizer unavailable, clipping by characters instead: {e}")
+        return None
+
+
+def clip_to_token_budget(text: str, max_tokens: int, model: str = "default") -> str:
+    """
+    Keep the first and last parts of `text` so it fits in `max_tokens` tokens.
+    The head usually holds the summary/requirements and the tail the most recent details.
+    """
+    if max_tokens <= 0:
+        return text
+    head_tokens = int(max_tokens * _CLIP_HEAD_RATIO)
+    tail_tokens = max_tokens - head_tokens
+    
+    encoding = _token_encoding(model)
+    if encoding is None:
+        if len(text) <= max_tokens * _CHARS_PER_TOKEN:
+            return text
+        head = text[:head_tokens * _CHARS_PER_TOKEN]
+        tail = text[len(text) - tail_tokens * _CHARS_PER_TOKEN:] if tail_tokens else ""
+        return f"{head}{_CLIP_MARKER}{tail}"
+    
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    tail = encoding.decode(tokens[len(tokens) - tail_tokens:]) if tail_tokens else ""
+    return f"{encoding.decode(tokens[:head_tokens])}{_CLIP_MARKER}{tail}"
+
+
+def build_label_prompt_prefix(label_rules: List[Dict]) -> str:
+    """
+    Build the static part of the description-matching prompt (task, label rules, instructions).
+    It is identical for every row, so it is computed once per evaluation and placed first,
+    which also lets providers with automatic prompt caching reuse it across rows.
+    """
+    rules_block = "\n".join(f"- {rule['label']}: {rule['rule']}" for rule in label_rules)
+    return f"""You are an expert HR analyst. Your task is to analyze a CV and Job Description (JD) and predict the most appropriate label based on the given rules.
+
+Available Labels and Rules:
+{rules_block}
+
+Instructions:
+1. Carefully analyze the CV and JD content
+2. Apply the rules for each label to determine the best match
+3. Return ONLY the predicted label name (exactly as written above)
+4. Do not include any explanation, reasoning, or additional text
+5. Ensure your response is consistent and deterministic
+
+"""
+
+
+def build_label_lookup(label_rules: List[Dict]) -> Dict[str, str]:
+    """
+    Map each label's casefolded name to the label as written in the rules.
+    Built once per evaluation so validating a response is a single hash lookup
+    that tolerates case differences in the model's answer.
+    """
+    return {rule['label'].casefold(): rule['label'] for rule in label_rules}
+
+
+async def call_llm_for_description_matching(cv_text: str, jd_text: str, label_rules: List[Dict], call_llm: Callable[[str], Awaitable[str]], prompt_prefix: Optional[str] = None, label_lookup: Optional[Dict[str, str]] = None) -> str:
+    """
+    Call LLM to predict label based on CV, JD and label rules
+    Returns predicted label string
+    """
+    if prompt_prefix is None:
+        prompt_prefix = build_label_prompt_prefix(label_rules)
+    if label_lookup is None:
+        label_lookup = build_label_lookup(label_rules)
+    prompt = f"""{prompt_prefix}CV Text:
+{cv_text}
+
+Job Description:
+{jd_text}
+
+Predicted Label:"""
+
+    try:
+        predicted_label = await call_llm(prompt)
             
         # Clean up the response to ensure it matches one of the available labels
-        available_labels = [rule['label'] for rule in label_rules]
         predicted_label = predicted_label.strip().strip('"').strip("'")
         
-        if predicted_label in available_labels:
-            return predicted_label
-        else:
-            # If response doesn't match any label, return "Error"
-            return "Error"
+        # If response doesn't match any label, return "Error"; otherwise use the label as written in the rules
+        return label_lookup.get(predicted_label.casefold(), "Error")
             
     except Exception as e:
         print(f"Error calling LLM for description matching: {e}")
         return "Error"
 
-@router.post("/parse-file")
-async def parse_file(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
+# Leading magic bytes of the spreadsheet containers we accept; anything else is treated as CSV
+_XLSX_SIGNATURE = b"PK\x03\x04"  # zip container (Office Open XML)
+_XLS_SIGNATURE = b"\xD0\xCF\x11\xE0"  # OLE2 compound file (legacy Excel)
+# Rust-backed reader for both .xlsx and .xls; much faster than openpyxl/xlrd for full-sheet reads
+_EXCEL_ENGINE = 'calamine'
+
+# Rows per DataFrame chunk in start-evaluation when not streaming through Arrow
+EVALUATION_CHUNK_SIZE = 10_000
+# Bytes of CSV parsed per Arrow record batch in start-evaluation; bounds memory for large CSVs
+_CSV_BLOCK_SIZE = 16 << 20
+
+
+def _detect_format(stream: BinaryIO) -> str:
     """
-    Parse uploaded Excel/CSV file and return column names
+    Identify the upload by its file signature rather than by its extension.
+    Returns 'xlsx', 'xls' or 'csv'. The stream is rewound afterwards.
+    """
+    head = stream.read(len(_XLS_SIGNATURE))
+    stream.seek(0)
+    if head.startswith(_XLSX_SIGNATURE):
+        return 'xlsx'
+    if head.startswith(_XLS_SIGNATURE):
+        return 'xls'
+    return 'csv'
+
+
+def _stream_size(stream: BinaryIO) -> int:
+    """
+    Size in bytes of a seekable upload stream, leaving it rewound.
+    """
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    return size
+
+
+def _read_columns(stream: BinaryIO, file_format: Optional[str] = None) -> List[str]:
+    """
+    Return the header row as pandas would name it, without parsing any data rows.
+    Pass file_format when the caller has already detected it.
+    """
+    file_format = file_format or _detect_format(stream)
+    if file_format == 'csv':
+        # Opening the Arrow streaming reader only parses the header and first block
+        try:
+            columns = pa_csv.open_csv(stream).schema.names
+        except pa.ArrowInvalid:
+            stream.seek(0)
+            columns = pd.read_csv(stream, nrows=0).columns.tolist()
+    else:
+        columns = pd.read_excel(stream, nrows=0, engine=_EXCEL_ENGINE).columns.tolist()
+    stream.seek(0)
+    return columns
+
+
+def _batches_to_frames(batches: Iterator[pa.RecordBatch]) -> Iterator[pd.DataFrame]:
+    """
+    Convert Arrow record batches to DataFrames, numbering rows across batches like the chunked pandas reader does
+    """
+    start = 0
+    for batch in batches:
+        df = batch.to_pandas()
+        df.index = pd.RangeIndex(start, start + len(df))
+        start += len(df)
+        yield df
+
+
+def _iter_dataframe_chunks(stream: BinaryIO, usecols: List[str], chunksize: int = EVALUATION_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Yield the selected columns as string DataFrames.
+    CSVs are streamed as Arrow record batches of roughly _CSV_BLOCK_SIZE bytes
+    (pandas' pyarrow engine does not support chunksize), falling back to the C
+    engine in `chunksize`-row chunks for files Arrow cannot parse. Excel has no
+    chunked reader, so it is loaded once and sliced into `chunksize` rows.
+    """
+    file_format = _detect_format(stream)
+    if file_format == 'csv':
+        yielded = False
+        try:
+            reader = pa_csv.open_csv(
+                stream,
+                read_options=pa_csv.ReadOptions(block_size=_CSV_BLOCK_SIZE),
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=usecols,
+                    column_types={column: pa.string() for column in usecols},
+                ),
+            )
+            for df in _batches_to_frames(reader):
+                yielded = True
+                yield df
+        except pa.ArrowInvalid:
+            if yielded:
+                raise
+            # Arrow rejects ragged rows that the C engine pads with NaN
+            stream.seek(0)
+            yield from pd.read_csv(stream, usecols=usecols, dtype=str, chunksize=chunksize)
+        return
+    df = pd.read_excel(stream, usecols=usecols, dtype=str, engine=_EXCEL_ENGINE)
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+# parse-file/analyze-labels results for recent uploads, keyed by content hash: {key: (expires_at, result)}
+_upload_summary_cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+_upload_summary_lock = threading.Lock()
+_UPLOAD_SUMMARY_CACHE_SIZE = 256
+
+
+def _hash_stream(stream: BinaryIO) -> str:
+    """
+    SHA-256 of a seekable upload stream, read in blocks and left rewound.
+    """
+    stream.seek(0)
+    digest = hashlib.file_digest(stream, "sha256").hexdigest()
+    stream.seek(0)
+    return digest
+
+
+def _cached_upload_summary(kind: str, stream: BinaryIO, compute: Callable[[BinaryIO], Any], *extra_key: str) -> Any:
+    """
+    Return compute(stream), reusing the result for a byte-identical upload seen within the TTL.
+    Users often re-upload the same file while adjusting the evaluation config.
+    """
+    ttl = settings.upload_cache_ttl_seconds
+    if ttl <= 0:
+        return compute(stream)
+    
+    key = "\x1e".join((kind, _hash_stream(stream), *extra_key))
+    now = time.monotonic()
+    with _upload_summary_lock:
+        entry = _upload_summary_cache.get(key)
+        if entry is not None and entry[0] > now:
+            _upload_summary_cache.move_to_end(key)
+            return entry[1]
+    
+    result = compute(stream)
+    with _upload_summary_lock:
+        _upload_summary_cache[key] = (now + ttl, result)
+        _upload_summary_cache.move_to_end(key)
+        while len(_upload_summary_cache) > _UPLOAD_SUMMARY_CACHE_SIZE:
+            _upload_summary_cache.popitem(last=False)
+    return result
+
+
+def _inspect_csv(stream: BinaryIO) -> Tuple[List[str], int]:
+    """
+    Return (columns, total_rows) for a CSV without building a DataFrame.
+    Uses the csv module so quoted multi-line cells are counted as a single row.
+    """
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text_stream)
+        columns = next(reader, [])
+        # pandas skips blank lines by default; mirror that for the row count
+        total_rows = sum(1 for row in reader if row)
+    finally:
+        # Leave the underlying upload file open for the caller
+        text_stream.detach()
+    return columns, total_rows
+
+
+def _inspect_xlsx(stream: BinaryIO) -> Tuple[List[str], int]:
+    """
+    Return (columns, total_rows) for an .xlsx workbook using openpyxl's read-only mode.
+    """
+    wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, ())
+        columns = _excel_header(header, empty=None)
+        if ws.max_row is not None:
+            total_rows = max(ws.max_row - 1, 0)
+        else:
+            # Workbook without a stored dimension: count the rows instead
+            total_rows = sum(1 for _ in rows)
+        return columns, total_rows
+    finally:
+        wb.close()
+
+
+def _inspect_xls(stream: BinaryIO) -> Tuple[List[str], int]:
+    """
+    Return (columns, total_rows) for a legacy .xls workbook from xlrd's sheet dimensions.
+    """
+    book = xlrd.open_workbook(file_contents=stream.read(), on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        header = sheet.row_values(0) if sheet.nrows else []
+        columns = _excel_header(header, empty="")
+        return columns, max(sheet.nrows - 1, 0)
+    finally:
+        book.release_resources()
+
+
+def _inspect_upload(stream: BinaryIO) -> Tuple[List[str], int]:
+    """
+    Return (columns, total_rows) for any supported upload, dispatching on its signature.
+    Only the header and a row count are needed, so no DataFrame is built.
+    """
+    file_format = _detect_format(stream)
+    if file_format == 'csv':
+        return _inspect_csv(stream)
+    if file_format == 'xlsx':
+        return _inspect_xlsx(stream)
+    return _inspect_xls(stream)
+
+
+def _excel_header(header, empty: Any) -> List[str]:
+    """
+    Column names for an Excel header row, naming blank cells the way pandas does
     """
-    if not file.filename:
+    return [str(value) if value != empty else f"Unnamed: {i}" for i, value in enumerate(header)]
+
+
+def _label_value(value: Any) -> Optional[str]:
+    """
+    Normalize a label cell to the string start-evaluation will compare against (None for blanks).
+    Whole-number floats from Excel (e.g. 1.0) read as "1", matching the calamine reader.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _missing_label_column(label_column: str) -> HTTPException:
+    return HTTPException(status_code=400, detail=f"Column '{label_column}' not found in file")
+
+
+def _count_labels_csv(stream: BinaryIO, label_column: str) -> Tuple[Counter, int]:
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text_stream)
+        header = next(reader, [])
+        if label_column not in header:
+            raise _missing_label_column(label_column)
+        index = header.index(label_column)
+        counts: Counter = Counter()
+        total_rows = 0
+        for row in reader:
+            # pandas skips blank lines by default; mirror that for the row count
+            if not row:
+                continue
+            total_rows += 1
+            label = _label_value(row[index]) if index < len(row) else None
+            if label is not None:
+                counts[label] += 1
+        return counts, total_rows
+    finally:
+        # Leave the underlying upload file open for the caller
+        text_stream.detach()
+
+
+def _count_labels_xlsx(stream: BinaryIO, label_column: str) -> Tuple[Counter, int]:
+    wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        header = next(ws.iter_rows(max_row=1, values_only=True), ())
+        columns = _excel_header(header, empty=None)
+        if label_column not in columns:
+            raise _missing_label_column(label_column)
+        column = columns.index(label_column) + 1
+        counts: Counter = Counter()
+        total_rows = 0
+        # Only the label column is materialized for each row
+        for (value,) in ws.iter_rows(min_row=2, min_col=column, max_col=column, values_only=True):
+            total_rows += 1
+            label = _label_value(value)
+            if label is not None:
+                counts[label] += 1
+        return counts, total_rows
+    finally:
+        wb.close()
+
+
+def _count_labels_xls(stream: BinaryIO, label_column: str) -> Tuple[Counter, int]:
+    book = xlrd.open_workbook(file_contents=stream.read(), on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        columns = _excel_header(sheet.row_values(0) if sheet.nrows else [], empty="")
+        if label_column not in columns:
+            raise _missing_label_column(label_column)
+        values = sheet.col_values(columns.index(label_column), start_rowx=1)
+        counts = Counter(label for label in map(_label_value, values) if label is not None)
+        return counts, max(sheet.nrows - 1, 0)
+    finally:
+        book.release_resources()
+
+
+def _count_labels(stream: BinaryIO, label_column: str) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Return ([{"label", "count"}, ...], total_rows) for the given column of an upload.
+    Only the label column is read and counted as rows stream by, so no DataFrame is built.
+    """
+    file_format = _detect_format(stream)
+    if file_format == 'csv':
+        counts, total_rows = _count_labels_csv(stream, label_column)
+    elif file_format == 'xlsx':
+        counts, total_rows = _count_labels_xlsx(stream, label_column)
+    else:
+        counts, total_rows = _count_labels_xls(stream, label_column)
+    
+    # Most frequent first, like value_counts()
+    labels = [{"label": label, "count": count} for label, count in counts.most_common()]
+    return labels, total_rows
+
+
+_FILE_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def _stored_upload_path(user_id: int, file_id: str) -> str:
+    """
+    Path of a user's stored upload; file_id is the SHA-256 of the uploaded bytes
+    """
+    if not _FILE_ID_PATTERN.fullmatch(file_id):
+        raise HTTPException(status_code=400, detail="Invalid file_id")
+    return os.path.join(settings.evaluation_upload_dir, str(user_id), f"{file_id}.arrow")
+
+
+def _read_upload_table(stream: BinaryIO) -> pa.Table:
+    """
+    Parse a whole upload into an Arrow table with every column as string
+    """
+    file_format = _detect_format(stream)
+    columns = _read_columns(stream, file_format)
+    if file_format == 'csv':
+        try:
+            return pa_csv.read_csv(
+                stream,
+                read_options=pa_csv.ReadOptions(block_size=_CSV_BLOCK_SIZE),
+                convert_options=pa_csv.ConvertOptions(column_types={column: pa.string() for column in columns}),
+            )
+        except pa.ArrowInvalid:
+            # Arrow rejects ragged rows that the C engine pads with NaN
+            stream.seek(0)
+            df = pd.read_csv(stream, dtype=str)
+    else:
+        df = pd.read_excel(stream, dtype=str, engine=_EXCEL_ENGINE)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _store_upload(stream: BinaryIO, path: str) -> pa.Table:
+    """
+    Parse the upload once and keep it as an uncompressed Arrow IPC (Feather v2) file,
+    so later requests memory-map it instead of parsing again. Returns the mapped table.
+    """
+    if os.path.exists(path):
+        # Same bytes uploaded before: refresh its age and reuse it
+        os.utime(path)
+    else:
+        table = _read_upload_table(stream)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write under a temporary name so concurrent readers never see a partial file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return feather.read_table(path, memory_map=True)
+
+
+def _load_stored_upload(user_id: int, file_id: str) -> pa.Table:
+    """
+    Memory-map a stored upload; uncompressed Arrow is read zero-copy
+    """
+    path = _stored_upload_path(user_id, file_id)
+    try:
+        # Every use refreshes its age, so an upload still being evaluated is not pruned
+        os.utime(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Uploaded file not found or expired, please upload it again")
+    return feather.read_table(path, memory_map=True)
+
+
+# When stored uploads were last pruned (time.monotonic()); None until the first prune
+_last_prune: Optional[float] = None
+_prune_lock = threading.Lock()
+
+
+def _prune_stored_uploads() -> None:
+    """
+    Delete stored uploads that have not been used within the TTL.
+    This walks every user's uploads, so it runs at most once per tenth of the TTL.
+    """
+    global _last_prune
+    now = time.monotonic()
+    with _prune_lock:
+        if _last_prune is not None and now - _last_prune < settings.evaluation_upload_ttl_seconds / 10:
+            return
+        _last_prune = now
+    cutoff = time.time() - settings.evaluation_upload_ttl_seconds
+    for root, _, filenames in os.walk(settings.evaluation_upload_dir):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                # Removed by a concurrent prune
+                pass
+
+
+def _count_table_labels(table: pa.Table, label_column: str) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Same result as _count_labels, computed with Arrow's value_counts on a stored upload
+    """
+    if label_column not in table.column_names:
+        raise _missing_label_column(label_column)
+    counts = pc.value_counts(table.column(label_column))
+    labels = [
+        {"label": label, "count": count}
+        for label, count in zip(counts.field("values").to_pylist(), counts.field("counts").to_pylist())
+        if label not in (None, "")
+    ]
+    # Most frequent first; the sort is stable so ties keep first-seen order
+    labels.sort(key=lambda item: item["count"], reverse=True)
+    return labels, table.num_rows
+
+
+def _iter_table_chunks(table: pa.Table, usecols: List[str], chunksize: int = EVALUATION_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Yield the selected columns of a stored upload in `chunksize`-row DataFrames
+    """
+    yield from _batches_to_frames(iter(table.select(usecols).to_batches(max_chunksize=chunksize)))
+
+
+def _validate_upload_filename(file: Optional[UploadFile]) -> None:
+    if not file or not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
     
     # Check file extension
     if not file.filename.lower().endswith(('.xlsx', '.xls', '.csv')):
         raise HTTPException(status_code=400, detail="Only Excel (.xlsx, .xls) and CSV files are supported")
+
+
+@router.post("/upload")
+async def upload_evaluation_file(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Parse an Excel/CSV file once and store it for analyze-labels and start-evaluation.
+    Returns the same fields as parse-file plus a file_id to send instead of the file.
+    """
+    _validate_upload_filename(file)
     
     try:
-        # Read file content
-        content = await file.read()
+        stream = file.file
+        file_size = _stream_size(stream)
         
-        # Parse based on file type
-        if file.filename.lower().endswith('.csv'):
-            # Parse CSV
-            df = pd.read_csv(io.BytesIO(content))
-        else:
-            # Parse Excel
-            df = pd.read_excel(io.BytesIO(content))
+        # Content-addressed: re-uploading the same bytes reuses the stored table
+        file_id = await asyncio.to_thread(_hash_stream, stream)
+        path = _stored_upload_path(current_user.id, file_id)
+        table = await asyncio.to_thread(_store_upload, stream, path)
+        await asyncio.to_thread(_prune_stored_uploads)
+        
+        return {
+            "file_id": file_id,
+            "columns": table.column_names,
+            "total_rows": table.num_rows,
+            "file_name": file.filename,
+            "file_size": file_size
+        }
         
-        # Get column names
-        columns = df.columns.tolist()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to parse file: {str(e)}")
+
+
+@router.post("/parse-file")
+async def parse_file(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Parse uploaded Excel/CSV file and return column names
+    """
+    _validate_upload_filename(file)
+    
+    try:
+        # Work on the spooled upload file directly instead of reading it into memory
+        stream = file.file
+        file_size = _stream_size(stream)
         
-        # Get basic file info
-        total_rows = len(df)
+        # Parsing is blocking work; run it in a worker thread so the event loop stays responsive.
+        # Re-uploads of the same bytes are answered from the cache without parsing.
+        columns, total_rows = await asyncio.to_thread(_cached_upload_summary, "columns", stream, _inspect_upload)
         
         return {
             "columns": columns,
             "total_rows": total_rows,
             "file_name": file.filename,
-            "file_size": len(content)
+            "file_size": file_size
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to parse file: {str(e)}")
 
+
 @router.post("/analyze-labels")
 async def analyze_labels(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     label_column: str = Form(...),
+    file_id: str = Form(None),  # From /evaluation/upload, instead of sending the file again
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Analyze labels from selected column in the uploaded file
     """
-    if not file.filename:
+    if not file_id and (not file or not file.filename):
         raise HTTPException(status_code=400, detail="No file provided")
     
     if not label_column:
         raise HTTPException(status_code=400, detail="Label column not specified")
     
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Parse based on file type
-        if file.filename.lower().endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(content))
+        if file_id:
+            table = await asyncio.to_thread(_load_stored_upload, current_user.id, file_id)
+            labels, total_rows = await asyncio.to_thread(_count_table_labels, table, label_column)
         else:
-            df = pd.read_excel(io.BytesIO(content))
-        
-        # Check if label column exists
-        if label_column not in df.columns:
-            raise HTTPException(status_code=400, detail=f"Column '{label_column}' not found in file")
-        
-        # Count labels
-        label_counts = df[label_column].value_counts().to_dict()
-        
-        # Convert to list of objects
-        labels = [{"label": label, "count": count} for label, count in label_counts.items()]
-        
-        # Get total rows
-        total_rows = len(df)
+            # Parsing and counting are blocking work; run them in a worker thread (cached per file content)
+            labels, total_rows = await asyncio.to_thread(
+                _cached_upload_summary, "labels", file.file,
+                lambda stream: _count_labels(stream, label_column), label_column
+            )
         
         return {
             "labels": labels,
@@ -216,42 +816,140 @@ async def analyze_labels(
             "label_column": label_column
         }
         
+    except HTTPException:
+        # Already a deliberate status (e.g. 404 for an expired file_id); don't rewrap it as a 400
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to analyze labels: {str(e)}")
 
-@router.post("/start-evaluation")
+
+def _threshold_decision(thresholds: Dict[str, Dict[str, float]], expected_label: str) -> Tuple[float, float, str]:
+    """
+    Return (match_threshold, no_match_threshold, fallback_label) for an expected label.
+    The fallback is the first other configured label, predicted when the score is below no-match.
+    """
+    label_threshold = thresholds.get(expected_label, {})
+    fallback_label = next((label for label in thresholds if label != expected_label), "no_match")
+    return label_threshold.get('match', 0.7), label_threshold.get('noMatch', 0.3), fallback_label
+
+
+def _iter_evaluation_rows(df: pd.DataFrame, cv_column: str, jd_column: str, label_column: str):
+    """
+    Yield (index, cv_text, jd_text, expected_label) for rows that have both a CV and a JD
+    """
+    # Pull the columns out as plain object arrays once instead of boxing every row into a Series
+    cv_texts = df[cv_column].fillna("").astype(str).to_numpy()
+    jd_texts = df[jd_column].fillna("").astype(str).to_numpy()
+    expected_labels = df[label_column].fillna("").astype(str).to_numpy()
+    
+    for index, cv_text, jd_text, expected_label in zip(df.index.tolist(), cv_texts, jd_texts, expected_labels):
+        if not cv_text or not jd_text:
+            continue
+        
+        yield index, cv_text, jd_text, expected_label
+
+
+async def _anonymize_rows(rows: List[Tuple[Any, str, str, str]]) -> List[Tuple[str, str]]:
+    """
+    Anonymize the CV and JD of every row in one batched Presidio pass, returning (cv, jd) pairs
+    """
+    texts = [text for _, cv_text, jd_text, _ in rows for text in (cv_text, jd_text)]
+    # The Presidio client is blocking HTTP, so keep it off the event loop
+    anonymized = await asyncio.to_thread(analyze_and_anonymize_batch, texts)
+    return list(zip(anonymized[0::2], anonymized[1::2]))
+
+
+async def _iterate_in_thread(iterator: Iterator[Any]) -> AsyncIterator[Any]:
+    """
+    Drive a blocking iterator (e.g. a chunked pandas reader) from a worker thread, one item at a time
+    """
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+async def _run_bounded(semaphore: asyncio.Semaphore, coro: Awaitable) -> Any:
+    async with semaphore:
+        return await coro
+
+
+async def _gather_bounded(coros: List[Awaitable], limit: int) -> List[Any]:
+    """
+    Await coroutines concurrently with at most `limit` in flight; results keep input order
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+    return await asyncio.gather(*(_run_bounded(semaphore, coro) for coro in coros))
+
+
+async def _iter_bounded(coros: List[Awaitable], limit: int) -> AsyncIterator[Any]:
+    """
+    Like _gather_bounded, but yield each result as soon as it completes
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+    tasks = [asyncio.ensure_future(_run_bounded(semaphore, coro)) for coro in coros]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The client went away or a row failed: don't leave the remaining calls running
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/start-evaluation", response_model=Dict[str, Any])
 async def start_evaluation(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     cv_column: str = Form(...),
     jd_column: str = Form(...),
     label_column: str = Form(...),
     matching_method: str = Form(...),
     label_thresholds: str = Form(None),  # JSON string for threshold method
     label_rules: str = Form(None),  # Optional for description method
+    stream_results: bool = Form(False),  # Stream rows as NDJSON as they complete
+    file_id: str = Form(None),  # From /evaluation/upload, instead of sending the file again
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Start evaluation process with the uploaded file and configuration
+    Start evaluation process with the uploaded file and configuration.
+    With stream_results, rows are returned as NDJSON lines in completion order,
+    followed by a {"status": "done", ...} summary line.
     """
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Parse based on file type
-        if file.filename.lower().endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(content))
-        else:
-            df = pd.read_excel(io.BytesIO(content))
+        if not file_id and (not file or not file.filename):
+            raise HTTPException(status_code=400, detail="No file provided")
         
-        # Validate columns exist
         required_columns = [cv_column, jd_column, label_column]
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        usecols = list(dict.fromkeys(required_columns))
+        if file_id:
+            # Stored upload: memory-mapped, no parsing
+            table = await asyncio.to_thread(_load_stored_upload, current_user.id, file_id)
+            available_columns = table.column_names
+            open_chunks = lambda: _iter_table_chunks(table, usecols)
+        else:
+            # Validate columns exist (header only; the rows are read in chunks below)
+            stream = file.file
+            available_columns = await asyncio.to_thread(_read_columns, stream)
+            open_chunks = lambda: _iter_dataframe_chunks(stream, usecols)
+        missing_columns = [col for col in required_columns if col not in available_columns]
         if missing_columns:
             raise HTTPException(status_code=400, detail=f"Missing columns: {missing_columns}")
         
-        # Get user's LLM config for scoring
-        llm_config = db.query(LLMConfig).filter(LLMConfig.user_id == current_user.id).first()
+        # Get user's LLM config for scoring, copied out of the session once for the whole run
+        llm_config = await asyncio.to_thread(load_llm_config, db, current_user.id)
+        # Cached predictions are only valid for the model that produced them
+        model_identity = (llm_config.provider, llm_config.model) if llm_config else ("default", "default")
+        
+        if settings.llm_input_token_budget > 0:
+            # Loading the tokenizer may download its BPE file; keep that off the event loop
+            await asyncio.to_thread(_token_encoding, model_identity[1])
+        
+        def clip_text(text: str) -> str:
+            # Bound the tokens each CV/JD contributes to the prompt (display fields keep the raw text)
+            return clip_to_token_budget(text, settings.llm_input_token_budget, model_identity[1])
         
         if matching_method == "threshold":
             # Threshold-based evaluation
@@ -259,37 +957,31 @@ async def start_evaluation(
                 raise HTTPException(status_code=400, detail="Label thresholds are required for threshold-based evaluation")
             
             thresholds = json.loads(label_thresholds)
-            results = []
+            # Thresholds and fallback label per configured label, resolved once instead of per row
+            label_decisions = {label: _threshold_decision(thresholds, label) for label in thresholds}
+            # Scoring goes through the ADK agent, so no provider client is opened for the run
+            llm_session = nullcontext()
+            summary = {
+                "message": "Threshold-based evaluation completed",
+                "label_thresholds": thresholds
+            }
             
-            # Process each row
-            for index, row in df.iterrows():
-                cv_text = str(row[cv_column]) if pd.notna(row[cv_column]) else ""
-                jd_text = str(row[jd_column]) if pd.notna(row[jd_column]) else ""
-                expected_label = str(row[label_column]) if pd.notna(row[label_column]) else ""
-                
-                if not cv_text or not jd_text:
-                    continue
-                
-                # Anonymize texts
-                anonymized_cv = analyze_and_anonymize(cv_text)
-                anonymized_jd = analyze_and_anonymize(jd_text)
-                
+            async def process_row(call_llm, index, cv_text: str, jd_text: str, expected_label: str, anonymized_cv: str, anonymized_jd: str) -> Dict[str, Any]:
                 # Compute similarity score
                 try:
-                    # Import here to avoid circular imports
-                    from .adk_agent.agent import run_resume_scoring_agent
-                    
-                    if llm_config and (llm_config.llm_api_key or llm_config.ollama_base_url):
-                        result = await run_resume_scoring_agent(
-                            anonymized_cv,
-                            anonymized_jd,
-                            llm_provider=str(llm_config.llm_provider.value if hasattr(llm_config.llm_provider, 'value') else llm_config.llm_provider),
-                            llm_model_name=llm_config.llm_model_name,
-                            api_key=llm_config.llm_api_key,
+                    # Shares the scoring cache, so identical CV/JD pairs under the same config reuse the earlier score
+                    cv_input, jd_input = clip_text(anonymized_cv), clip_text(anonymized_jd)
+                    if llm_config and (llm_config.api_key or llm_config.ollama_base_url):
+                        result = await compute_similarity_score_detailed_async(
+                            cv_input,
+                            jd_input,
+                            llm_provider=llm_config.provider,
+                            llm_model_name=llm_config.model,
+                            api_key=llm_config.api_key,
                             ollama_base_url=llm_config.ollama_base_url,
                         )
                     else:
-                        result = await run_resume_scoring_agent(anonymized_cv, anonymized_jd)
+                        result = await compute_similarity_score_detailed_async(cv_input, jd_input)
                     
                     score = result.get("score", 0.0) if isinstance(result, dict) else 0.0
                 except Exception as e:
@@ -297,37 +989,26 @@ async def start_evaluation(
                     score = 0.0  # Default score on error
                 
                 # Predict label based on thresholds for this specific label
-                label_threshold = thresholds.get(expected_label, {})
-                match_threshold = label_threshold.get('match', 0.7)
-                no_match_threshold = label_threshold.get('noMatch', 0.3)
+                match_threshold, no_match_threshold, fallback_label = (
+                    label_decisions.get(expected_label) or _threshold_decision(thresholds, expected_label)
+                )
                 
                 # Use the expected label as the predicted label based on score
                 if score >= match_threshold:
                     predicted_label = expected_label  # High score = match the expected label
                 elif score < no_match_threshold:
-                    # Find a different label from the available labels
-                    available_labels = list(thresholds.keys())
-                    other_labels = [label for label in available_labels if label != expected_label]
-                    predicted_label = other_labels[0] if other_labels else "no_match"
+                    predicted_label = fallback_label  # Low score = a different label
                 else:
                     predicted_label = "uncertain"  # Between thresholds
                 
-                results.append({
+                return {
+                    "row": index,
                     "cv": cv_text[:500],  # Truncate for display
                     "jd": jd_text[:500],
                     "expectedLabel": expected_label,
                     "predictedLabel": predicted_label,
                     "score": score
-                })
-            
-            return {
-                "status": "success",
-                "message": "Threshold-based evaluation completed",
-                "total_rows": len(df),
-                "processed_rows": len(results),
-                "label_thresholds": thresholds,
-                "results": results
-            }
+                }
             
         elif matching_method == "description":
             # Description-based evaluation using LLM
@@ -335,54 +1016,101 @@ async def start_evaluation(
                 raise HTTPException(status_code=400, detail="Label rules are required for description-based evaluation")
             
             rules = json.loads(label_rules)
-            results = []
+            rules_key = json.dumps(rules, sort_keys=True)
+            prompt_prefix = build_label_prompt_prefix(rules)
+            label_lookup = build_label_lookup(rules)
+            # Predictions are only shared between runs made with the same key / Ollama server (make_cache_key hashes it)
+            credentials = (llm_config.api_key, llm_config.ollama_base_url) if llm_config else (None, None)
+            # One provider client for the whole run, shared by every row
+            llm_session = open_llm_caller(llm_config)
+            summary = {
+                "message": "Description-based evaluation completed",
+                "label_rules": rules
+            }
             
-            # Process each row
-            for index, row in df.iterrows():
-                cv_text = str(row[cv_column]) if pd.notna(row[cv_column]) else ""
-                jd_text = str(row[jd_column]) if pd.notna(row[jd_column]) else ""
-                expected_label = str(row[label_column]) if pd.notna(row[label_column]) else ""
-                
-                if not cv_text or not jd_text:
-                    continue
-                
-                # Anonymize texts
-                anonymized_cv = analyze_and_anonymize(cv_text)
-                anonymized_jd = analyze_and_anonymize(jd_text)
-                
-                # Call LLM for prediction
+            async def process_row(call_llm, index, cv_text: str, jd_text: str, expected_label: str, anonymized_cv: str, anonymized_jd: str) -> Dict[str, Any]:
+                # Call LLM for prediction; repeated CV/JD pairs are served from the cache
                 try:
-                    predicted_label = await call_llm_for_description_matching(
-                        anonymized_cv, 
-                        anonymized_jd, 
-                        rules, 
-                        llm_config
+                    predicted_label = await _prediction_cache.get_or_compute(
+                        make_cache_key("label", *model_identity, *credentials, rules_key, anonymized_cv, anonymized_jd),
+                        lambda: call_llm_for_description_matching(
+                            clip_text(anonymized_cv), 
+                            clip_text(anonymized_jd), 
+                            rules, 
+                            call_llm,
+                            prompt_prefix,
+                            label_lookup
+                        ),
+                        cacheable=lambda label: label != "Error"
                     )
                 except Exception as e:
                     print(f"Error calling LLM for row {index}: {e}")
                     predicted_label = "Error"  # Return "Error" on failure
                 
-                results.append({
+                return {
+                    "row": index,
                     "cv": cv_text[:500],  # Truncate for display
                     "jd": jd_text[:500],
                     "expectedLabel": expected_label,
                     "predictedLabel": predicted_label
-                })
+                }
             
-            return {
-                "status": "success",
-                "message": "Description-based evaluation completed",
-                "total_rows": len(df),
-                "processed_rows": len(results),
-                "label_rules": rules,
-                "results": results
-            }
         else:
             raise HTTPException(status_code=400, detail="Invalid matching method. Use 'threshold' or 'description'")
         
+        progress = {"total_rows": 0, "processed_rows": 0}
+        
+        async def evaluate(ordered: bool) -> AsyncIterator[Dict[str, Any]]:
+            # Rows run concurrently per chunk; ordered mode keeps row order, otherwise rows are yielded as they finish
+            async with llm_session as call_llm:
+                async for chunk in _iterate_in_thread(open_chunks()):
+                    progress["total_rows"] += len(chunk)
+                    rows = list(_iter_evaluation_rows(chunk, cv_column, jd_column, label_column))
+                    anonymized_rows = await _anonymize_rows(rows)
+                    coros = [process_row(call_llm, *row, *anonymized) for row, anonymized in zip(rows, anonymized_rows)]
+                    if ordered:
+                        chunk_results = await _gather_bounded(coros, settings.evaluation_concurrency)
+                        progress["processed_rows"] += len(chunk_results)
+                        for row_result in chunk_results:
+                            yield row_result
+                    else:
+                        async for row_result in _iter_bounded(coros, settings.evaluation_concurrency):
+                            progress["processed_rows"] += 1
+                            yield row_result
+        
+        if stream_results:
+            async def ndjson_lines() -> AsyncIterator[str]:
+                try:
+                    async for row_result in evaluate(ordered=False):
+                        yield json.dumps(row_result) + "\n"
+                except Exception as e:
+                    print(f"Error streaming evaluation: {e}")
+                    yield json.dumps({"status": "error", "detail": f"Failed to run evaluation: {str(e)}"}) + "\n"
+                    return
+                yield json.dumps({
+                    "status": "done",
+                    **summary,
+                    "total_rows": progress["total_rows"],
+                    "processed_rows": progress["processed_rows"]
+                }) + "\n"
+            
+            return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+        
+        results = [row_result async for row_result in evaluate(ordered=True)]
+        return {
+            "status": "success",
+            "message": summary["message"],
+            "total_rows": progress["total_rows"],
+            "processed_rows": len(results),
+            **{key: value for key, value in summary.items() if key != "message"},
+            "results": results
+        }
+        
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid label rules JSON format")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid threshold value: {str(e)}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to start evaluation: {str(e)}")
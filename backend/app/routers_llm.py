@@ -1,16 +1,48 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+import asyncio
+import copy
 import os
-import requests
-import json
+import re
+import aiohttp
+import orjson
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
 
-from .deps import get_db, get_current_user
+from .config import settings
+from .deps import get_db, get_current_user, get_http_client
+from .llm_cache import AsyncLRUCache, make_cache_key
 from .models import LLMConfig, LLMProvider, CV, User
 from .schemas import LLMConfigIn, LLMConfigOut, CVParseResponse, CVParsedField, APIKeyValidateRequest, APIKeyValidateResponse
 
 
 router = APIRouter(prefix="/llm", tags=["llm"])
 
+# Patterns for pulling a JSON object out of a free-form Gemini response
+_JSON_FENCE_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+_JSON_OBJ_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def _default_parsed() -> dict:
+    """Every parsed CV has these keys; missing scalars default to None and missing lists to [].
+    Built per call so the list defaults are never shared between parse results.
+    """
+    return {
+        "full_name": None,
+        "email": None,
+        "phone": None,
+        "location": None,
+        "current_position": None,
+        "skills": [],
+        "education": [],
+        "experience": [],
+        "projects": [],
+    }
+
+
+# Parsed (and key-validated) CV metadata by provider/model/API key/sampling settings + prompt.
+# The key is hashed into the cache key so results never cross between users' keys.
+_parse_cache = AsyncLRUCache(settings.llm_cache_size)
+
 
 @router.get("/config", response_model=LLMConfigOut)
 def get_config(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
@@ -23,6 +55,7 @@ def get_config(db: Session = Depends(get_db), user: User = Depends(get_current_u
         llm_temperature=cfg.llm_temperature,
         llm_top_p=cfg.llm_top_p,
         llm_max_tokens=cfg.llm_max_tokens,
+        llm_request_timeout=cfg.llm_request_timeout,
         ollama_base_url=cfg.ollama_base_url,
     )
 
@@ -39,6 +72,7 @@ def set_config(payload: LLMConfigIn, db: Session = Depends(get_db), user: User =
     cfg.llm_temperature = payload.llm_temperature
     cfg.llm_top_p = payload.llm_top_p
     cfg.llm_max_tokens = payload.llm_max_tokens
+    cfg.llm_request_timeout = payload.llm_request_timeout
     cfg.ollama_base_url = payload.ollama_base_url
     db.commit()
     return LLMConfigOut(
@@ -47,42 +81,54 @@ def set_config(payload: LLMConfigIn, db: Session = Depends(get_db), user: User =
         llm_temperature=cfg.llm_temperature,
         llm_top_p=cfg.llm_top_p,
         llm_max_tokens=cfg.llm_max_tokens,
+        llm_request_timeout=cfg.llm_request_timeout,
         ollama_base_url=cfg.ollama_base_url,
     )
 
 
+async def _gemini_key_accepted(http: aiohttp.ClientSession, url: str) -> bool:
+    try:
+        async with http.get(url, timeout=aiohttp.ClientTimeout(total=10)) as r:
+            return r.status == 200
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return False
+
+
 @router.post("/validate-api-key", response_model=APIKeyValidateResponse)
-def validate_api_key(payload: APIKeyValidateRequest, user: User = Depends(get_current_user)):
+async def validate_api_key(
+    payload: APIKeyValidateRequest,
+    user: User = Depends(get_current_user),
+    http: aiohttp.ClientSession = Depends(get_http_client),
+):
     try:
         if payload.kind == "llm":
             if payload.provider == "openai":
                 # Minimal validation: list models
                 url = os.getenv("OPENAI_MODELS_URL", "https://api.openai.com/v1/models")
                 headers = {"Authorization": f"Bearer {payload.api_key}"}
-                r = requests.get(url, headers=headers, timeout=20)
-                if r.status_code == 200:
+                async with http.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=20)) as r:
+                    status = r.status
+                if status == 200:
                     return APIKeyValidateResponse(valid=True, message="OpenAI key is valid")
-                return APIKeyValidateResponse(valid=False, message=f"OpenAI validation failed: {r.status_code}")
+                return APIKeyValidateResponse(valid=False, message=f"OpenAI validation failed: {status}")
             elif payload.provider == "gemini":
-                # Try both v1 and v1beta endpoints for Gemini validation
+                # Try both v1 and v1beta endpoints for Gemini validation, in parallel;
+                # the first one to accept the key wins and the other request is cancelled
                 urls = [
                     f"https://generativelanguage.googleapis.com/v1/models?key={payload.api_key}",
                     f"https://generativelanguage.googleapis.com/v1beta/models?key={payload.api_key}"
                 ]
-                
-                for url in urls:
-                    try:
-                        r = requests.get(url, timeout=20)
-                        if r.status_code == 200:
+                checks = [asyncio.ensure_future(_gemini_key_accepted(http, url)) for url in urls]
+                try:
+                    for check in asyncio.as_completed(checks):
+                        if await check:
                             return APIKeyValidateResponse(valid=True, message="Gemini key is valid")
-                        elif r.status_code in [400, 403]:
-                            # Try next URL if this one returns 400 or 403
-                            continue
-                    except Exception:
-                        continue
+                finally:
+                    for check in checks:
+                        check.cancel()
                 
                 # If all URLs failed, return error
-                return APIKeyValidateResponse(valid=False, message=f"Gemini validation failed: Invalid API key or insufficient permissions")
+                return APIKeyValidateResponse(valid=False, message="Gemini validation failed: Invalid API key or insufficient permissions")
             elif payload.provider == "ollama":
                 # Validate Ollama by checking if the base URL is accessible and has models
                 if not payload.ollama_base_url:
@@ -100,9 +146,11 @@ def validate_api_key(payload: APIKeyValidateRequest, user: User = Depends(get_cu
                     
                     # Check if Ollama server is running by trying to list models
                     url = f"{base_url.rstrip('/')}/api/tags"
-                    r = requests.get(url, timeout=10)
-                    if r.status_code == 200:
-                        models = r.json().get('models', [])
+                    async with http.get(url, timeout=aiohttp.ClientTimeout(total=10)) as r:
+                        status = r.status
+                        data = await r.json(content_type=None) if status == 200 else None
+                    if status == 200:
+                        models = data.get('models', [])
                         model_names = [model.get('name', '') for model in models]
                         
                         # Check if the specified model exists
@@ -112,8 +160,8 @@ def validate_api_key(payload: APIKeyValidateRequest, user: User = Depends(get_cu
                             available_models = ', '.join(model_names[:5])  # Show first 5 models
                             return APIKeyValidateResponse(valid=False, message=f"Model '{payload.model_name}' not found. Available models: {available_models}")
                     else:
-                        return APIKeyValidateResponse(valid=False, message=f"Ollama server not accessible: {r.status_code}")
-                except requests.exceptions.ConnectionError:
+                        return APIKeyValidateResponse(valid=False, message=f"Ollama server not accessible: {status}")
+                except aiohttp.ClientConnectionError:
                     return APIKeyValidateResponse(valid=False, message="Cannot connect to Ollama server. Make sure it's running.")
                 except Exception as e:
                     return APIKeyValidateResponse(valid=False, message=f"Ollama validation error: {e}")
@@ -121,21 +169,38 @@ def validate_api_key(payload: APIKeyValidateRequest, user: User = Depends(get_cu
                 return APIKeyValidateResponse(valid=False, message="Unsupported LLM provider")
         else:
             return APIKeyValidateResponse(valid=False, message="Unsupported kind")
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         return APIKeyValidateResponse(valid=False, message=f"Network error: {e}")
     except Exception as e:
         return APIKeyValidateResponse(valid=False, message=f"Validation error: {e}")
 
 
+def _load_cv_and_config(db: Session, cv_id: int, user_id: int):
+    cv = db.query(CV).filter(CV.id == cv_id, CV.owner_id == user_id).first()
+    cfg = db.query(LLMConfig).filter(LLMConfig.user_id == user_id).first() if cv else None
+    return cv, cfg
+
+
+def _save_parsed_metadata(db: Session, cv: CV, data) -> None:
+    # Set and commit in one worker thread: the Session and the CV instance are never mutated from the event loop
+    cv.parsed_metadata = data
+    db.commit()
+
+
 @router.post("/parse/{cv_id}", response_model=CVParseResponse)
-def parse_cv(cv_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    cv = db.query(CV).filter(CV.id == cv_id, CV.owner_id == user.id).first()
+async def parse_cv(
+    cv_id: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    http: aiohttp.ClientSession = Depends(get_http_client),
+):
+    # Sync Session work runs in a worker thread so it never blocks the event loop
+    cv, cfg = await asyncio.to_thread(_load_cv_and_config, db, cv_id, user.id)
     if not cv:
         raise HTTPException(status_code=404, detail="CV not found")
     if not cv.content_text:
         raise HTTPException(status_code=400, detail="CV has no text content")
 
-    cfg = db.query(LLMConfig).filter(LLMConfig.user_id == user.id).first()
     if not cfg or not cfg.llm_api_key:
         raise HTTPException(status_code=400, detail="LLM config missing")
 
@@ -170,24 +235,58 @@ Resume text:
 
     try:
         if cfg.llm_provider == LLMProvider.openai:
-            data = _call_openai(cfg, prompt)
+            data = await _cached_call(_call_openai, cfg, prompt, http)
         elif cfg.llm_provider == LLMProvider.gemini:
-            data = _call_gemini(cfg, prompt)
+            data = await _cached_call(_call_gemini, cfg, prompt, http)
         else:
             raise HTTPException(status_code=400, detail="Unsupported provider")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM error: {e}")
 
     # Save parsed metadata to database
-    cv.parsed_metadata = json.dumps(data)
-    db.commit()
-    db.refresh(cv)
+    await asyncio.to_thread(_save_parsed_metadata, db, cv, data)
     
     fields = [CVParsedField(name=k, value=str(v)) for k, v in (data or {}).items()]
     return CVParseResponse(fields=fields)
 
 
-def _call_openai(cfg: LLMConfig, prompt: str):
+async def _cached_call(call, cfg: LLMConfig, prompt: str, client: aiohttp.ClientSession):
+    """Run an LLM helper through the parse cache; re-parsing an unchanged CV is then free."""
+    provider = cfg.llm_provider.value if hasattr(cfg.llm_provider, 'value') else cfg.llm_provider
+    key = make_cache_key(
+        "parse", provider, cfg.llm_model_name, cfg.llm_api_key, cfg.llm_temperature, cfg.llm_top_p, cfg.llm_max_tokens, prompt
+    )
+    # Unparseable responses come back as {"error": ...}; retry those next time
+    data = await _parse_cache.get_or_compute(
+        key,
+        lambda: call(cfg, prompt, client),
+        cacheable=lambda data: isinstance(data, dict) and "error" not in data,
+    )
+    # The cached dict is shared; each caller (and each CV row it is stored on) gets its own copy
+    return copy.deepcopy(data)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Timeouts, dropped connections, rate limits and 5xx are worth another try; other 4xx are not."""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_random_exponential(multiplier=1, max=8),
+    retry=retry_if_exception(_is_transient),
+    reraise=True,
+)
+async def _post_json(client: aiohttp.ClientSession, url: str, body: dict, timeout: float, headers: dict | None = None):
+    """POST to an LLM endpoint with a per-attempt timeout, retrying stragglers with jittered backoff."""
+    async with client.post(url, json=body, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+        r.raise_for_status()
+        return await r.json(content_type=None)
+
+
+async def _call_openai(cfg: LLMConfig, prompt: str, client: aiohttp.ClientSession):
     url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1/chat/completions")
     headers = {"Authorization": f"Bearer {cfg.llm_api_key}", "Content-Type": "application/json"}
     body = {
@@ -203,26 +302,20 @@ def _call_openai(cfg: LLMConfig, prompt: str):
     }
     
     try:
-        r = requests.post(url, json=body, headers=headers, timeout=60)
-        r.raise_for_status()
-        j = r.json()
+        j = await _post_json(client, url, body, cfg.llm_request_timeout, headers=headers)
         content = j["choices"][0]["message"]["content"]
         
         # Try to parse JSON
         try:
-            parsed_data = json.loads(content)
-            # Validate required structure
-            required_keys = ["full_name", "email", "phone", "location", "current_position", "skills", "education", "experience", "projects"]
-            for key in required_keys:
-                if key not in parsed_data:
-                    parsed_data[key] = None if key in ["full_name", "email", "phone", "location", "current_position"] else []
-            return parsed_data
-        except json.JSONDecodeError as e:
+            parsed_data = orjson.loads(content)
+            # Fill in any required keys the model left out
+            return _default_parsed() | parsed_data
+        except orjson.JSONDecodeError as e:
             print(f"OpenAI JSON parsing error: {e}")
             print(f"Raw response: {content}")
             return {"error": "Failed to parse JSON response", "raw": content}
             
-    except requests.exceptions.RequestException as e:
+    except aiohttp.ClientError as e:
         print(f"OpenAI API error: {e}")
         raise Exception(f"OpenAI API error: {e}")
     except Exception as e:
@@ -230,7 +323,7 @@ def _call_openai(cfg: LLMConfig, prompt: str):
         raise Exception(f"Unexpected error: {e}")
 
 
-def _call_gemini(cfg: LLMConfig, prompt: str):
+async def _call_gemini(cfg: LLMConfig, prompt: str, client: aiohttp.ClientSession):
     # Support both Gemini 1.x and 2.x
     # Gemini 2.x uses v1, Gemini 1.x uses v1beta
     if cfg.llm_model_name.startswith('gemini-2'):
@@ -244,27 +337,24 @@ def _call_gemini(cfg: LLMConfig, prompt: str):
     }
     
     try:
-        r = requests.post(url, json=body, timeout=60)
-        r.raise_for_status()
-        j = r.json()
+        j = await _post_json(client, url, body, cfg.llm_request_timeout)
         text = j.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
         
         # Parse JSON from Gemini response (might be wrapped in ```json...```)
         try:
             # Try direct JSON parsing first
-            parsed_data = json.loads(text)
-        except json.JSONDecodeError:
+            parsed_data = orjson.loads(text)
+        except orjson.JSONDecodeError:
             try:
                 # Try to extract JSON from ```json...``` format
-                import re
-                json_match = re.search(r'```json\s*(.*?)\s*```', text, re.DOTALL)
+                json_match = _JSON_FENCE_RE.search(text)
                 if json_match:
-                    parsed_data = json.loads(json_match.group(1))
+                    parsed_data = orjson.loads(json_match.group(1))
                 else:
                     # Try to find JSON object in the text
-                    json_match = re.search(r'\{.*\}', text, re.DOTALL)
+                    json_match = _JSON_OBJ_RE.search(text)
                     if json_match:
-                        parsed_data = json.loads(json_match.group(0))
+                        parsed_data = orjson.loads(json_match.group(0))
                     else:
                         print(f"Gemini JSON parsing failed, raw response: {text}")
                         return {"error": "Failed to parse JSON response", "raw": text}
@@ -273,15 +363,10 @@ def _call_gemini(cfg: LLMConfig, prompt: str):
                 print(f"Raw response: {text}")
                 return {"error": "Failed to extract JSON", "raw": text}
         
-        # Validate required structure
-        required_keys = ["full_name", "email", "phone", "location", "current_position", "skills", "education", "experience", "projects"]
-        for key in required_keys:
-            if key not in parsed_data:
-                parsed_data[key] = None if key in ["full_name", "email", "phone", "location", "current_position"] else []
-        
-        return parsed_data
+        # Fill in any required keys the model left out
+        return _default_parsed() | parsed_data
         
-    except requests.exceptions.RequestException as e:
+    except aiohttp.ClientError as e:
         print(f"Gemini API error: {e}")
         raise Exception(f"Gemini API error: {e}")
     except Exception as e:
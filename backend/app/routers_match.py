@@ -1,29 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from sqlalchemy.orm import Session
-import tempfile
-import os
-from typing import List
-import json
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Response, status
+from sqlalchemy.orm import Session, load_only, selectinload
+import asyncio
+import orjson
+from typing import Any, Dict, List
 
+from .config import settings
 from .deps import get_db, get_current_user
-from .models import CV, User, UserRole, CVCollection
-from .schemas import MatchRequestSingle, MatchScore, HRMatchRequest, HRMatchResponse, HRMatchItem, CollectionResponse, MatchingRequest
-from .text_extract import sniff_and_extract_text
+from .llm_cache import AsyncLRUCache, make_cache_key
+from .models import CV, User, UserRole, CVCollection, LLMConfig
+from .schemas import MatchRequestSingle, MatchScore, HRMatchRequest, HRMatchResponse, CollectionResponse, CVItem, MatchingRequest
+from .text_extract import sniff_and_extract_text_from_bytes, sniff_and_extract_text_from_stream, extract_many, CONTENT_TYPE_MAP, LOCAL_EXTRACT_EXTENSIONS, file_extension
+from .minio_client import get_minio_client
 from .tika_client import extract_text_via_tika
-from .scoring import compute_similarity_score, compute_similarity_score_detailed
-from .models import LLMConfig
-from .adk_agent.agent import run_resume_scoring_agent
-from .models import LLMConfig
-from .cv_enhancement import generate_enhanced_cv_pdf, generate_enhanced_cv_pdf_and_analysis
+from .scoring import compute_similarity_score_async, compute_similarity_score_detailed_async
+from .cv_enhancement import generate_enhanced_cv_pdf_and_analysis
 # Presidio anonymization disabled
 # from .presidio_client import analyze_and_anonymize
 
 
 router = APIRouter(prefix="/match", tags=["match"])
 
+# Size 0: nothing is kept once a score is returned, only concurrent duplicates are merged
+_single_score_inflight = AsyncLRUCache(maxsize=0)
+
+
+def _scoring_llm_kwargs(llm_config) -> Dict[str, Any]:
+    """Scoring agent kwargs for the user's LLM config; empty (agent defaults) when no key or Ollama URL is set"""
+    if not (llm_config and (llm_config.llm_api_key or llm_config.ollama_base_url)):
+        return {}
+    provider = llm_config.llm_provider
+    return dict(
+        llm_provider=str(provider.value if hasattr(provider, 'value') else provider),
+        llm_model_name=llm_config.llm_model_name,
+        api_key=llm_config.llm_api_key,
+        ollama_base_url=llm_config.ollama_base_url,
+    )
+
+
+def _load_llm_config(db: Session, user_id: int):
+    # Sync Session: async routes call this through asyncio.to_thread so the query never blocks the loop
+    return db.query(LLMConfig).filter(LLMConfig.user_id == user_id).first()
+
+
+def _load_match_cvs(db: Session, user_id: int, cv_ids: List[int]) -> List[CV]:
+    # Text is re-extracted from the stored file, so skip the large content/metadata columns
+    return db.query(CV).options(
+        load_only(CV.id, CV.filename, CV.object_key)
+    ).filter(CV.id.in_(cv_ids), CV.owner_id == user_id).all()
+
 
 @router.post("/single", response_model=MatchScore)
-def match_single(
+async def match_single(
     payload: MatchRequestSingle,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -36,22 +63,17 @@ def match_single(
     anonymized_jd_text = payload.jd_text
     
     # Use user's LLM config so the agent has a valid key
-    llm_config = db.query(LLMConfig).filter(LLMConfig.user_id == user.id).first()
-    if llm_config and (llm_config.llm_api_key or llm_config.ollama_base_url):
-        score = compute_similarity_score(
-            anonymized_cv_text,
-            anonymized_jd_text,
-            llm_provider=str(llm_config.llm_provider.value if hasattr(llm_config.llm_provider, 'value') else llm_config.llm_provider),
-            llm_model_name=llm_config.llm_model_name,
-            api_key=llm_config.llm_api_key,
-            ollama_base_url=llm_config.ollama_base_url,
-        )
-    else:
-        score = compute_similarity_score(anonymized_cv_text, anonymized_jd_text)
+    llm_config = await asyncio.to_thread(_load_llm_config, db, user.id)
+    llm_kwargs = _scoring_llm_kwargs(llm_config)
+    # Identical requests already being scored (double submits, client retries) wait on that run
+    score = await _single_score_inflight.get_or_compute(
+        make_cache_key("single", anonymized_cv_text, anonymized_jd_text, *llm_kwargs.values()),
+        lambda: compute_similarity_score_async(anonymized_cv_text, anonymized_jd_text, **llm_kwargs),
+    )
     return MatchScore(score=score)
 
 
-@router.post("/single_detailed")
+@router.post("/single_detailed", response_model=Dict[str, Any])
 async def match_single_detailed(
     payload: MatchRequestSingle,
     user: User = Depends(get_current_user),
@@ -63,24 +85,14 @@ async def match_single_detailed(
     anonymized_cv_text = payload.cv_text
     anonymized_jd_text = payload.jd_text
 
-    llm_config = db.query(LLMConfig).filter(LLMConfig.user_id == user.id).first()
-    if llm_config and (llm_config.llm_api_key or llm_config.ollama_base_url):
-        result = await run_resume_scoring_agent(
-            anonymized_cv_text,
-            anonymized_jd_text,
-            llm_provider=str(llm_config.llm_provider.value if hasattr(llm_config.llm_provider, 'value') else llm_config.llm_provider),
-            llm_model_name=llm_config.llm_model_name,
-            api_key=llm_config.llm_api_key,
-            ollama_base_url=llm_config.ollama_base_url,
-        )
-    else:
-        result = await run_resume_scoring_agent(anonymized_cv_text, anonymized_jd_text)
+    llm_config = await asyncio.to_thread(_load_llm_config, db, user.id)
+    result = await compute_similarity_score_detailed_async(anonymized_cv_text, anonymized_jd_text, **_scoring_llm_kwargs(llm_config))
 
     # result contains score breakdown and may contain analysis
     return result
 
 
-@router.post("/enhance-cv")
+@router.post("/enhance-cv", response_model=Dict[str, Any])
 async def enhance_cv(
     payload: MatchRequestSingle,
     user: User = Depends(get_current_user),
@@ -91,7 +103,7 @@ async def enhance_cv(
         raise HTTPException(status_code=400, detail="cv_text and jd_text are required")
 
     # Get user's LLM config
-    llm_config = db.query(LLMConfig).filter(LLMConfig.user_id == user.id).first()
+    llm_config = await asyncio.to_thread(_load_llm_config, db, user.id)
     
     try:
         print(f"DEBUG: LLM Config - Provider: {llm_config.llm_provider if llm_config else None}, Model: {llm_config.llm_model_name if llm_config else None}")
@@ -105,13 +117,12 @@ async def enhance_cv(
             ollama_base_url=llm_config.ollama_base_url if llm_config else None,
         )
         
-        from fastapi.responses import JSONResponse
         import base64
         pdf_b64 = base64.b64encode(result['pdf']).decode('utf-8')
-        return JSONResponse(content={
+        return {
             'pdf_base64': pdf_b64,
             'analysis': result.get('analysis', {})
-        })
+        }
     except Exception as e:
         print(f"DEBUG: Error in enhance_cv: {str(e)}")
         import traceback
@@ -120,85 +131,137 @@ async def enhance_cv(
 
 
 @router.post("/single-file", response_model=MatchScore)
-def match_single_file(
+async def match_single_file(
     cv_file: UploadFile = File(...),
     jd_file: UploadFile = File(...),
     user: User = Depends(get_current_user),
 ):
-    cv_text = _read_upload_to_text(cv_file)
-    jd_text = _read_upload_to_text(jd_file)
+    # Extraction (and a possible Tika round-trip) is blocking; run both files side by side off the event loop
+    cv_text, jd_text = await asyncio.gather(
+        asyncio.to_thread(_read_upload_to_text, cv_file),
+        asyncio.to_thread(_read_upload_to_text, jd_file),
+    )
     
     # Use raw texts directly (anonymization disabled)
     anonymized_cv_text = cv_text
     anonymized_jd_text = jd_text
     
-    score = compute_similarity_score(anonymized_cv_text, anonymized_jd_text)
+    score = await compute_similarity_score_async(anonymized_cv_text, anonymized_jd_text)
     return MatchScore(score=score)
 
 
+def _clip_extracted(text: str) -> str:
+    """Apply the matching text budget to Tika output too (local extractors already stop early)"""
+    return (text or "")[:settings.extract_max_chars or None]
+
+
 def _read_upload_to_text(file: UploadFile) -> str:
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        content = file.file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    """Extract text straight from the upload's spooled file; nothing is copied into memory first"""
+    stream = file.file
+    text = sniff_and_extract_text_from_stream(stream, file.filename, settings.extract_max_chars) or ""
+    if not text:
+        stream.seek(0)
+        content_type = file.content_type or CONTENT_TYPE_MAP.get(file_extension(file.filename), 'application/octet-stream')
+        text = extract_text_via_tika(stream, content_type, file.filename)
+    return _clip_extracted(text)
+
+
+def _download_cv_bytes(client, cv: CV) -> bytes:
+    """Fetch a CV file stored in MinIO"""
+    response = client.get_object(bucket_name=settings.minio_bucket, object_name=cv.object_key)
     try:
-        text = sniff_and_extract_text(tmp_path, file.filename) or ""
-        if not text:
-            content_type = file.content_type or 'application/octet-stream'
-            file.file.seek(0)
-            raw = file.file.read()
-            text = extract_text_via_tika(raw, content_type, file.filename)
+        return response.read()
     finally:
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
-    return text
+        response.close()
+        response.release_conn()
 
 
-def _extract_cv_text_from_file(cv: CV) -> str:
-    """Extract text from CV file stored in MinIO"""
-    from .minio_client import get_minio_client
-    from .config import settings
-    
+def _extract_from_bytes(raw: bytes, filename: str, content_type: str = None) -> str:
+    """Extract text from file bytes in memory, falling back to Tika for formats not handled locally"""
+    text = sniff_and_extract_text_from_bytes(raw, filename, settings.extract_max_chars) or ""
+    return _clip_extracted(text) if text else _extract_via_tika(raw, filename, content_type)
+
+
+def _extract_via_tika(raw: bytes, filename: str, content_type: str = None) -> str:
+    # Determine content type based on file extension
+    content_type = content_type or CONTENT_TYPE_MAP.get(file_extension(filename), 'application/octet-stream')
+    return _clip_extracted(extract_text_via_tika(raw, content_type, filename))
+
+
+def _stream_cv_to_tika(client, cv: CV) -> str:
+    """Pipe a stored CV from MinIO straight into Tika without holding the whole file in memory"""
+    response = client.get_object(bucket_name=settings.minio_bucket, object_name=cv.object_key)
     try:
-        client = get_minio_client()
-        file_data = client.get_object(bucket_name=settings.minio_bucket, object_name=cv.object_key)
-        content = file_data.read()
-        
-        # Save to temp file for text extraction
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
-            
-        try:
-            text = sniff_and_extract_text(tmp_path, cv.filename) or ""
-            if not text:
-                # Determine content type based on file extension
-                file_ext = cv.filename.lower().split('.')[-1]
-                content_type_map = {
-                    'pdf': 'application/pdf',
-                    'doc': 'application/msword',
-                    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                    'txt': 'text/plain',
-                    'rtf': 'application/rtf'
-                }
-                content_type = content_type_map.get(file_ext, 'application/octet-stream')
-                text = extract_text_via_tika(content, content_type, cv.filename)
-        finally:
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
-                
-        return text or ""
+        content_type = CONTENT_TYPE_MAP.get(file_extension(cv.filename), 'application/octet-stream')
+        return _clip_extracted(extract_text_via_tika(response.stream(amt=1 << 16), content_type, cv.filename))
+    finally:
+        response.close()
+        response.release_conn()
+
+
+async def _fetch_cv_text(client, cv: CV) -> str:
+    """Download and extract a stored CV in worker threads, so many CVs overlap their I/O"""
+    try:
+        # Formats only Tika understands never need the bytes locally
+        if file_extension(cv.filename) not in LOCAL_EXTRACT_EXTENSIONS:
+            return await asyncio.to_thread(_stream_cv_to_tika, client, cv)
+        raw = await asyncio.to_thread(_download_cv_bytes, client, cv)
+        return await asyncio.to_thread(_extract_from_bytes, raw, cv.filename)
     except Exception as e:
         print(f"Error extracting text from CV {cv.filename}: {e}")
         return ""
 
 
+async def _fetch_cv_texts(client, cvs: List[CV]) -> Dict[int, str]:
+    """Extract a batch of stored CVs: downloads overlap in threads, PDF/DOCX parsing runs in worker processes"""
+    local = [cv for cv in cvs if file_extension(cv.filename) in LOCAL_EXTRACT_EXTENSIONS]
+
+    async def download(cv: CV):
+        try:
+            return await asyncio.to_thread(_download_cv_bytes, client, cv)
+        except Exception as e:
+            print(f"Error downloading CV {cv.filename}: {e}")
+            return None
+
+    raws = await asyncio.gather(*(download(cv) for cv in local))
+    downloaded = [(cv, raw) for cv, raw in zip(local, raws) if raw is not None]
+    async def extract_in_thread(cv: CV, raw: bytes):
+        try:
+            return await asyncio.to_thread(sniff_and_extract_text_from_bytes, raw, cv.filename, settings.extract_max_chars)
+        except Exception as e:
+            print(f"Error extracting text from CV {cv.filename}: {e}")
+            return None
+
+    try:
+        parsed = await asyncio.to_thread(
+            extract_many, [(raw, cv.filename) for cv, raw in downloaded], settings.extract_max_chars
+        )
+    except Exception as e:
+        # A crashed worker or a payload that cannot be shipped to one must not fail the whole batch
+        print(f"Batch CV extraction failed, extracting one file at a time: {e}")
+        parsed = await asyncio.gather(*(extract_in_thread(cv, raw) for cv, raw in downloaded))
+    texts = {cv.id: "" for cv in cvs}
+    texts.update((cv.id, text) for (cv, _), text in zip(downloaded, parsed) if text)
+
+    async def via_tika(cv: CV, raw: bytes) -> None:
+        try:
+            texts[cv.id] = await asyncio.to_thread(_extract_via_tika, raw, cv.filename)
+        except Exception as e:
+            print(f"Error extracting text from CV {cv.filename}: {e}")
+
+    async def streamed(cv: CV) -> None:
+        texts[cv.id] = await _fetch_cv_text(client, cv)
+
+    # Whatever could not be read locally goes to Tika: unsupported formats and files that yielded no text
+    await asyncio.gather(
+        *(via_tika(cv, raw) for (cv, raw), text in zip(downloaded, parsed) if not text),
+        *(streamed(cv) for cv in cvs if file_extension(cv.filename) not in LOCAL_EXTRACT_EXTENSIONS),
+    )
+    return texts
+
+
 @router.post("/hr", response_model=HRMatchResponse)
-def match_hr(
+async def match_hr(
     payload: HRMatchRequest,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
@@ -208,58 +271,62 @@ def match_hr(
     if not payload.cv_ids:
         raise HTTPException(status_code=400, detail="cv_ids is required")
 
-    cvs = db.query(CV).filter(CV.id.in_(payload.cv_ids), CV.owner_id == user.id).all()
+    cvs = await asyncio.to_thread(_load_match_cvs, db, user.id, payload.cv_ids)
     id_to_cv = {cv.id: cv for cv in cvs}
     
     # Pull LLM config for this user to set model card and API key
-    llm_config = db.query(LLMConfig).filter(LLMConfig.user_id == user.id).first()
-    results = []
+    llm_config = await asyncio.to_thread(_load_llm_config, db, user.id)
+    # Use agent-based structured scoring, configured by user's LLM settings if available.
+    # The settings are the same for every CV, so resolve them once.
+    llm_kwargs = _scoring_llm_kwargs(llm_config)
     
     # Use raw JD text (anonymization disabled)
     anonymized_jd_text = payload.jd_text
     
-    for cv_id in payload.cv_ids:
-        cv = id_to_cv.get(cv_id)
-        if not cv:
-            continue
-            
-        # Extract CV text from file
-        cv_text = _extract_cv_text_from_file(cv)
-        anonymized_cv_text = cv_text
+    # Bound the number of LLM scorings in flight so the provider's rate limit is respected
+    semaphore = asyncio.Semaphore(max(1, settings.match_concurrency))
+    # One MinIO client for every download in this request
+    client = await asyncio.to_thread(get_minio_client)
+    
+    # Extract every CV up front so parsing is spread across worker processes
+    cv_texts = await _fetch_cv_texts(client, cvs)
+    
+    async def score_cv(cv: CV) -> Dict[str, Any]:
+        anonymized_cv_text = cv_texts[cv.id]
         
-        # Use agent-based structured scoring, configured by user's LLM settings if available
-        if llm_config and (llm_config.llm_api_key or llm_config.ollama_base_url):
-            detailed_scores = compute_similarity_score_detailed(
+        async with semaphore:
+            detailed_scores = await compute_similarity_score_detailed_async(
                 anonymized_cv_text,
                 anonymized_jd_text,
-                llm_provider=str(llm_config.llm_provider.value if hasattr(llm_config.llm_provider, 'value') else llm_config.llm_provider),
-                llm_model_name=llm_config.llm_model_name,
-                api_key=llm_config.llm_api_key,
-                ollama_base_url=llm_config.ollama_base_url,
+                **llm_kwargs
             )
-        else:
-            detailed_scores = compute_similarity_score_detailed(anonymized_cv_text, anonymized_jd_text)
         
-        score = detailed_scores.get("score", 0.0)
+        score = float(detailed_scores.get("score") or 0.0)
         
-        results.append(HRMatchItem(
-            cv_id=cv.id, 
-            filename=cv.filename, 
-            score=score,
-            anonymized_cv_text=anonymized_cv_text,
-            anonymized_jd_text=anonymized_jd_text,
-            detailed_scores=detailed_scores
-        ))
+        # HRMatchItem fields; every value is already JSON-native, so nothing needs validating
+        return {
+            "cv_id": cv.id,
+            "filename": cv.filename,
+            "score": score,
+            "anonymized_cv_text": anonymized_cv_text,
+            "anonymized_jd_text": anonymized_jd_text,
+            "detailed_scores": detailed_scores,
+        }
+    
+    # Score all CVs concurrently instead of one LLM round-trip after another
+    results = await asyncio.gather(*(score_cv(id_to_cv[cv_id]) for cv_id in payload.cv_ids if cv_id in id_to_cv))
     
-    results.sort(key=lambda x: x.score, reverse=True)
-    return HRMatchResponse(results=results)
+    results.sort(key=lambda x: x["score"], reverse=True)
+    # The body repeats every CV and the JD text, often megabytes; orjson encodes it several times
+    # faster than the response_model serializer (kept for the OpenAPI schema)
+    return Response(content=orjson.dumps({"results": results}), media_type="application/json")
 
 
 router_matching = APIRouter(prefix="/matching", tags=["matching"])
 
 
 @router_matching.get("/collections", response_model=List[CollectionResponse])
-async def get_collections(
+def get_collections(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -270,44 +337,38 @@ async def get_collections(
             detail="Only HR users can access collections"
         )
     
-    collections = db.query(CVCollection).filter(
+    # Load every collection's CVs in one extra IN query instead of one query per collection
+    collections = db.query(CVCollection).options(
+        selectinload(CVCollection.cvs).load_only(CV.id, CV.filename, CV.created_at, CV.parsed_metadata)
+    ).filter(
         CVCollection.owner_id == current_user.id
     ).all()
     
     result = []
     for collection in collections:
-        # Get CVs for this collection
-        cvs = db.query(CV).filter(CV.collection_id == collection.id).all()
-        
         cv_list = []
-        for cv in cvs:
-            parsed_metadata = None
-            if cv.parsed_metadata:
-                try:
-                    parsed_metadata = json.loads(cv.parsed_metadata)
-                except json.JSONDecodeError:
-                    parsed_metadata = {}
-            
-            cv_list.append({
-                "id": cv.id,
-                "filename": cv.filename,
-                "uploaded_at": cv.created_at.isoformat(),
-                "parsed_metadata": parsed_metadata
-            })
+        for cv in collection.cvs:
+            cv_list.append(CVItem.model_construct(
+                id=cv.id,
+                filename=cv.filename,
+                uploaded_at=cv.created_at.isoformat(),
+                parsed_metadata=cv.parsed_metadata
+            ))
         
-        result.append({
-            "id": collection.id,
-            "name": collection.name,
-            "description": collection.description,
-            "created_at": collection.created_at.isoformat(),
-            "cvs": cv_list
-        })
+        # Rows come straight from the DB; constructed models are serialized without being re-validated
+        result.append(CollectionResponse.model_construct(
+            id=collection.id,
+            name=collection.name,
+            description=collection.description,
+            created_at=collection.created_at.isoformat(),
+            cvs=cv_list
+        ))
     
     return result
 
 
 @router_matching.post("/start")
-async def start_matching(
+def start_matching(
     request: MatchingRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
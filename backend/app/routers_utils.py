@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, UploadFile, File
 from .deps import get_current_user
 from .tika_client import extract_text_via_tika
@@ -8,20 +10,20 @@ router = APIRouter(prefix="/utils", tags=["utils"])
 
 
 @router.post("/extract-text")
-def extract_text(file: UploadFile = File(...), user=Depends(get_current_user)):
-    raw = file.file.read()
+async def extract_text(file: UploadFile = File(...), user=Depends(get_current_user)):
     content_type = file.content_type or 'application/octet-stream'
-    text = extract_text_via_tika(raw, content_type, file.filename)
+    # Stream the spooled upload to Tika rather than reading it into memory
+    text = await asyncio.to_thread(extract_text_via_tika, file.file, content_type, file.filename)
     return {"text": text}
 
 
 @router.post("/extract-text-anonymized")
-def extract_text_anonymized(file: UploadFile = File(...), user=Depends(get_current_user)):
-    raw = file.file.read()
+async def extract_text_anonymized(file: UploadFile = File(...), user=Depends(get_current_user)):
     content_type = file.content_type or 'application/octet-stream'
-    text = extract_text_via_tika(raw, content_type, file.filename)
+    # Stream the spooled upload to Tika rather than reading it into memory
+    text = await asyncio.to_thread(extract_text_via_tika, file.file, content_type, file.filename)
     if not text:
         return {"text": ""}
-    anonymized = analyze_and_anonymize(text)
+    anonymized = await asyncio.to_thread(analyze_and_anonymize, text)
     return {"text": anonymized}
 
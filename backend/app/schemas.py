@@ -1,52 +1,65 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from .models import UserRole, LLMProvider
 
 
 class UserCreate(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     email: EmailStr
     password: str
     role: UserRole
 
 
 class UserLogin(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     email: EmailStr
     password: str
 
 
 class ChangePassword(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     current_password: str
     new_password: str
 
 
 class UserOut(BaseModel):
+    model_config = ConfigDict(frozen=True, from_attributes=True, defer_build=True)
+
     id: int
     email: EmailStr
     role: UserRole
     created_at: datetime
     avatar_path: Optional[str] = None
 
-    class Config:
-        from_attributes = True
-
 
 class Token(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     access_token: str
     token_type: str = "bearer"
 
 
 class CVCollectionCreate(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     name: str
     description: Optional[str] = None
 
 
 class CVCollectionUpdate(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     name: Optional[str] = None
     description: Optional[str] = None
 
 
 class CVCollectionItem(BaseModel):
+    model_config = ConfigDict(frozen=True, from_attributes=True, defer_build=True)
+
     id: int
     name: str
     description: Optional[str] = None
@@ -54,15 +67,16 @@ class CVCollectionItem(BaseModel):
     updated_at: datetime
     cv_count: int = 0
 
-    class Config:
-        from_attributes = True
-
 
 class CVCollectionListResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     collections: List[CVCollectionItem]
 
 
 class CVCollectionDetailResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, from_attributes=True, defer_build=True)
+
     id: int
     name: str
     description: Optional[str] = None
@@ -70,50 +84,56 @@ class CVCollectionDetailResponse(BaseModel):
     updated_at: datetime
     cvs: List["CVListItem"]
 
-    class Config:
-        from_attributes = True
-
 
 class CVUploadResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, from_attributes=True, defer_build=True)
+
     id: int
     filename: str
     object_key: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class CVListItem(BaseModel):
+    model_config = ConfigDict(frozen=True, from_attributes=True, defer_build=True)
+
     id: int
     filename: str
     uploaded_at: datetime
     parsed_metadata: Optional[dict] = None
     collection_id: Optional[int] = None
 
-    class Config:
-        from_attributes = True
-
 
 class CVListResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     cvs: List[CVListItem]
+    total: int = 0
 
 
 class MatchRequestSingle(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     cv_text: Optional[str] = None
     jd_text: Optional[str] = None
 
 
 class MatchScore(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     score: float
 
 
 class HRMatchRequest(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     cv_ids: List[int]
     jd_text: str
 
 
 class HRMatchItem(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     cv_id: int
     filename: str
     score: float
@@ -124,31 +144,41 @@ class HRMatchItem(BaseModel):
 
 
 class HRMatchResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     results: List[HRMatchItem]
 
 
 class LLMConfigIn(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     llm_provider: LLMProvider
     llm_api_key: Optional[str] = None
     llm_model_name: str
     llm_temperature: float = 0.2
     llm_top_p: float = 1.0
     llm_max_tokens: int = 1024
+    llm_request_timeout: float = 15.0
     ollama_base_url: Optional[str] = None
     # Embedding settings removed
 
 
 class LLMConfigOut(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     llm_provider: LLMProvider
     llm_model_name: str
     llm_temperature: float
     llm_top_p: float
     llm_max_tokens: int
+    llm_request_timeout: float
     ollama_base_url: Optional[str] = None
     # Embedding fields removed
 
 
 class APIKeyValidateRequest(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     kind: str  # only "llm" supported now
     provider: str  # e.g., "openai", "gemini", or "ollama"
     api_key: Optional[str] = None
@@ -157,20 +187,28 @@ class APIKeyValidateRequest(BaseModel):
 
 
 class APIKeyValidateResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     valid: bool
     message: str
 
 
 class CVParsedField(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     name: str
     value: str
 
 
 class CVParseResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     fields: List[CVParsedField]
 
 
 class CVItem(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     id: int
     filename: str
     uploaded_at: str
@@ -178,6 +216,8 @@ class CVItem(BaseModel):
 
 
 class CollectionResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     id: int
     name: str
     description: Optional[str] = None
@@ -186,5 +226,10 @@ class CollectionResponse(BaseModel):
 
 
 class MatchingRequest(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     cv_ids: List[int]
 
+
+# Resolve the forward reference to CVListItem once all models are defined
+CVCollectionDetailResponse.model_rebuild()
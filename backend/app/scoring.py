@@ -1,29 +1,85 @@
 import asyncio
-from typing import Dict
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
 
+from .config import settings
+from .llm_cache import make_cache_key
 # Delegate scoring to the ADK agent's structured extraction + rule-based scoring
 from .adk_agent.agent import run_resume_scoring_agent
 
 
+# Detailed agent results by (provider, model, API key, Ollama URL, CV text, JD text) digest.
+# The key is part of the digest so one user's results are never served to another user's key.
+# Entries are private copies: callers get their own copy on every hit and may mutate it freely.
+_score_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_score_cache_lock = threading.Lock()
+
+
+def _score_cache_key(cv_text: str, jd_text: str, llm_provider: str = None, llm_model_name: str = None, api_key: str = None, ollama_base_url: str = None) -> str:
+    return make_cache_key("agent-score", llm_provider, llm_model_name, api_key, ollama_base_url, cv_text or "", jd_text or "")
+
+
+def _cached_score(key: str) -> Optional[Dict[str, Any]]:
+    with _score_cache_lock:
+        result = _score_cache.get(key)
+        if result is None:
+            return None
+        _score_cache.move_to_end(key)
+    return copy.deepcopy(result)
+
+
+def _store_score(key: str, result: Dict[str, Any]) -> None:
+    # Only complete runs are kept: without the analysis the LLM step failed and a retry may succeed
+    if settings.llm_cache_size <= 0 or "analysis" not in result:
+        return
+    snapshot = copy.deepcopy(result)
+    with _score_cache_lock:
+        _score_cache[key] = snapshot
+        _score_cache.move_to_end(key)
+        while len(_score_cache) > settings.llm_cache_size:
+            _score_cache.popitem(last=False)
+
+
+def _overall_score(result: Dict[str, Any]) -> float:
+    score = result.get("score", 0.0) if isinstance(result, dict) else 0.0
+    return float(round(score, 4))
+
+
 def compute_similarity_score(cv_text: str, jd_text: str, llm_provider: str = None, llm_model_name: str = None, api_key: str = None, ollama_base_url: str = None) -> float:
     """Compute match score using the agent's compute_relevant_score pipeline.
+    Returns a float in [0,1]. For callers without an event loop; async code should await compute_similarity_score_async.
+    """
+    return _overall_score(compute_similarity_score_detailed(cv_text, jd_text, llm_provider, llm_model_name, api_key, ollama_base_url))
+
+
+async def compute_similarity_score_async(cv_text: str, jd_text: str, llm_provider: str = None, llm_model_name: str = None, api_key: str = None, ollama_base_url: str = None) -> float:
+    """Async variant of compute_similarity_score; awaits the agent on the caller's loop, no thread hop.
     Returns a float in [0,1].
     """
-    # Run the async agent in a synchronous context
-    result: Dict[str, float] = asyncio.run(
-        run_resume_scoring_agent(cv_text or "", jd_text or "", llm_provider, llm_model_name, api_key, ollama_base_url)
-    )
-    score = result.get("score", 0.0) if isinstance(result, dict) else 0.0
-    return float(round(score, 4))
+    return _overall_score(await compute_similarity_score_detailed_async(cv_text, jd_text, llm_provider, llm_model_name, api_key, ollama_base_url))
 
 
 def compute_similarity_score_detailed(cv_text: str, jd_text: str, llm_provider: str = None, llm_model_name: str = None, api_key: str = None, ollama_base_url: str = None) -> Dict[str, float]:
     """Compute match score using the agent's compute_relevant_score pipeline.
+    Returns detailed scores dictionary. For callers without an event loop only; it runs the async path with asyncio.run.
+    """
+    return asyncio.run(compute_similarity_score_detailed_async(cv_text, jd_text, llm_provider, llm_model_name, api_key, ollama_base_url))
+
+
+async def compute_similarity_score_detailed_async(cv_text: str, jd_text: str, llm_provider: str = None, llm_model_name: str = None, api_key: str = None, ollama_base_url: str = None) -> Dict[str, float]:
+    """Async variant of compute_similarity_score_detailed for callers already running on an event loop.
     Returns detailed scores dictionary.
     """
-    # Run the async agent in a synchronous context
-    result: Dict[str, float] = asyncio.run(
-        run_resume_scoring_agent(cv_text or "", jd_text or "", llm_provider, llm_model_name, api_key, ollama_base_url)
+    key = _score_cache_key(cv_text, jd_text, llm_provider, llm_model_name, api_key, ollama_base_url)
+    cached = _cached_score(key)
+    if cached is not None:
+        return cached
+    result: Dict[str, float] = await run_resume_scoring_agent(
+        cv_text or "", jd_text or "", llm_provider, llm_model_name, api_key, ollama_base_url
     )
-    return result if isinstance(result, dict) else {"score": 0.0}
-
+    if not isinstance(result, dict):
+        return {"score": 0.0}
+    _store_score(key, result)
+    return result
@@ -1,7 +1,9 @@
-from datetime import datetime, timedelta
-from typing import Optional
+import time
+from datetime import timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
 
-from jose import jwt
+import jwt
 from passlib.context import CryptContext
 from .config import settings
 
@@ -9,7 +11,15 @@ from .config import settings
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 12  # 12 hours
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes use argon2id; bcrypt hashes from older accounts still verify and are
+# upgraded on the next successful login (see verify_and_update_password)
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=settings.argon2_time_cost,
+    argon2__memory_cost=settings.argon2_memory_cost,
+    argon2__parallelism=1,
+)
 
 
 def hash_password(password: str) -> str:
@@ -20,19 +30,34 @@ def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
 
+def verify_and_update_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also returns a fresh hash when the stored one uses a deprecated scheme or cost."""
+    return pwd_context.verify_and_update(password, hashed)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta is None:
         expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = data.copy()
-    to_encode.update({"exp": datetime.utcnow() + expires_delta})
+    to_encode["exp"] = int(time.time()) + int(expires_delta.total_seconds())
     token = jwt.encode(to_encode, settings.jwt_secret, algorithm="HS256")
     return token
 
 
-def decode_access_token(token: str) -> Optional[str]:
+@lru_cache(maxsize=8192)
+def _decode(token: str, secret: str) -> Tuple[Optional[str], int]:
+    # The secret is part of the cache key so rotating it invalidates every entry
     try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
-        return payload.get("sub")
+        payload = jwt.decode(token, secret, algorithms=["HS256"], options={"require": ["exp"]})
+        return payload.get("sub"), int(payload["exp"])
     except Exception:
+        return None, 0
+
+
+def decode_access_token(token: str) -> Optional[str]:
+    sub, exp = _decode(token, settings.jwt_secret)
+    # Checked on every call: a cached token must stop working once it expires
+    if exp <= time.time():
         return None
+    return sub
 
@@ -1,33 +1,162 @@
-from typing import Optional
-from PyPDF2 import PdfReader
+import mmap
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from itertools import repeat
+from typing import BinaryIO, List, Optional, Sequence, Tuple, Union
+import pypdfium2 as pdfium
 from docx import Document
 
+from .config import settings
 
-def extract_text_from_pdf(file_path: str) -> str:
+
+# MIME types for the CV formats we store, keyed by lowercase extension (no dot)
+CONTENT_TYPE_MAP = {
+    'pdf': 'application/pdf',
+    'doc': 'application/msword',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'txt': 'text/plain',
+    'rtf': 'application/rtf'
+}
+
+
+def file_extension(filename: Optional[str]) -> str:
+    return os.path.splitext(filename or "")[1][1:].lower()
+
+
+def extract_text_from_pdf(file_path: Union[str, BinaryIO], max_chars: Optional[int] = None) -> str:
+    """Extract the text of a PDF; with max_chars, stop reading pages once that much text is collected."""
     try:
-        reader = PdfReader(file_path)
-        parts = []
-        for page in reader.pages:
-            parts.append(page.extract_text() or "")
-        return "\n".join(parts)
+        # PDFium does the text extraction in C; PyPDF2's pure-Python parsing was the slow part of CV ingestion
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            parts = []
+            total = 0
+            for page in pdf:
+                textpage = page.get_textpage()
+                # PDFium ends lines with \r\n
+                parts.append((textpage.get_text_range() or "").replace("\r\n", "\n"))
+                textpage.close()
+                page.close()
+                total += len(parts[-1]) + 1
+                if max_chars and total >= max_chars:
+                    break
+            return "\n".join(parts)[:max_chars or None]
+        finally:
+            pdf.close()
     except Exception as e:
         print(f"Error extracting text from PDF {file_path}: {e}")
         return ""
 
 
-def extract_text_from_docx(file_path: str) -> str:
+def extract_text_from_docx(file_path: Union[str, BinaryIO], max_chars: Optional[int] = None) -> str:
     doc = Document(file_path)
-    return "\n".join([p.text for p in doc.paragraphs])
+    parts = []
+    total = 0
+    for p in doc.paragraphs:
+        parts.append(p.text)
+        total += len(p.text) + 1
+        if max_chars and total >= max_chars:
+            break
+    return "\n".join(parts)[:max_chars or None]
+
+
+def _read_txt_file(file_path: str, max_chars: Optional[int] = None) -> str:
+    # Map the file instead of reading it into a Python buffer; mmap rejects empty files
+    if os.path.getsize(file_path) == 0:
+        return ""
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # UTF-8 needs at most 4 bytes per character
+        raw = mm[:max_chars * 4] if max_chars else mm[:]
+    return raw.decode("utf-8", errors="ignore")[:max_chars or None]
+
+
+def _read_txt_stream(stream: BinaryIO, max_chars: Optional[int] = None) -> str:
+    raw = stream.read(max_chars * 4) if max_chars else stream.read()
+    return raw.decode("utf-8", errors="ignore")[:max_chars or None]
+
+
+# Local extractors by lowercase extension (no dot); the path and stream tables cover the same formats
+_PATH_EXTRACTORS = {
+    'pdf': extract_text_from_pdf,
+    'docx': extract_text_from_docx,
+    'txt': _read_txt_file,
+}
+_STREAM_EXTRACTORS = {
+    'pdf': extract_text_from_pdf,
+    'docx': extract_text_from_docx,
+    'txt': _read_txt_stream,
+}
+
+# Extensions sniff_and_extract_text can read without Tika
+LOCAL_EXTRACT_EXTENSIONS = frozenset(_PATH_EXTRACTORS)
+
+
+def sniff_and_extract_text(file_path: str, filename: str, max_chars: Optional[int] = None) -> Optional[str]:
+    """Extract text locally when the format allows it (None otherwise); max_chars caps how much is read."""
+    extract = _PATH_EXTRACTORS.get(file_extension(filename))
+    return extract(file_path, max_chars) if extract else None
 
 
-def sniff_and_extract_text(file_path: str, filename: str) -> Optional[str]:
-    lower = filename.lower()
-    if lower.endswith(".pdf"):
-        return extract_text_from_pdf(file_path)
-    if lower.endswith(".docx"):
-        return extract_text_from_docx(file_path)
-    if lower.endswith(".txt"):
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
-    return None
+def sniff_and_extract_text_from_stream(stream: BinaryIO, filename: str, max_chars: Optional[int] = None) -> Optional[str]:
+    """Same as sniff_and_extract_text, reading from an open binary file object (e.g. an upload's spooled file)."""
+    extract = _STREAM_EXTRACTORS.get(file_extension(filename))
+    return extract(stream, max_chars) if extract else None
 
+
+def sniff_and_extract_text_from_bytes(raw: bytes, filename: str, max_chars: Optional[int] = None) -> Optional[str]:
+    """Same as sniff_and_extract_text, reading from in-memory bytes instead of a temp file."""
+    return sniff_and_extract_text_from_stream(BytesIO(raw), filename, max_chars)
+
+
+def _extract_bytes_or_none(raw: bytes, filename: str, max_chars: Optional[int] = None) -> Optional[str]:
+    # Runs in a worker process; one unreadable file must not fail the rest of the batch
+    try:
+        return sniff_and_extract_text_from_bytes(raw, filename, max_chars)
+    except Exception as e:
+        print(f"Error extracting text from {filename}: {e}")
+        return None
+
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_pool_lock = threading.Lock()
+
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            # spawn, not fork: the server process has live threads and an event loop
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=settings.extract_workers or os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _extract_pool
+
+
+def shutdown_extract_pool() -> None:
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is not None:
+            _extract_pool.shutdown(wait=False, cancel_futures=True)
+            _extract_pool = None
+
+
+def extract_many(files: Sequence[Tuple[bytes, str]], max_chars: Optional[int] = None) -> List[Optional[str]]:
+    """Extract text from many (bytes, filename) pairs in parallel worker processes.
+
+    Results are in input order; None means the format needs Tika or the file could not be read.
+    A single file is extracted in-process, since shipping it to a worker would only add overhead.
+    """
+    if len(files) <= 1:
+        return [_extract_bytes_or_none(raw, filename, max_chars) for raw, filename in files]
+    raws, filenames = zip(*files)
+    try:
+        return list(_get_extract_pool().map(_extract_bytes_or_none, raws, filenames, repeat(max_chars)))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a malformed PDF); a broken pool stays broken, so start a fresh one next time
+        shutdown_extract_pool()
+        raise
@@ -51,7 +51,7 @@ def run_migration():
                 ) THEN 
                     ALTER TABLE cvs 
                     ADD CONSTRAINT fk_cv_collection 
-                    FOREIGN KEY (collection_id) REFERENCES cv_collections(id);
+                    FOREIGN KEY (collection_id) REFERENCES cv_collections(id) ON DELETE SET NULL;
                 END IF;
             END $$;
         """))
@@ -42,6 +42,7 @@ interface LLMConfig {
   llm_temperature: number;
   llm_top_p: number;
   llm_max_tokens: number;
+  llm_request_timeout: number;
   ollama_base_url?: string;
 }
 
@@ -91,6 +91,28 @@ const FileViewer: React.FC<{ cv: CV; token: string | null }> = ({ cv, token }) =
   const [anonOpen, setAnonOpen] = React.useState(false);
   const [anonLoading, setAnonLoading] = React.useState(false);
   const [anonText, setAnonText] = React.useState('');
+  const [fileUrl, setFileUrl] = React.useState<string | null>(null);
+
+  // Presigned MinIO URL for this CV, so the browser loads the file straight from storage
+  const fetchFileUrl = async (download = false): Promise<string> => {
+    const res = await fetch(`${API}/cv/${cv.id}/file-url${download ? '?download=true' : ''}`, {
+      headers: { 'Authorization': `Bearer ${token}` }
+    });
+    if (!res.ok) throw new Error('File not available');
+    const data = await res.json();
+    return data.url;
+  };
+
+  React.useEffect(() => {
+    if (!cv.filename.toLowerCase().endsWith('.pdf')) return;
+    let cancelled = false;
+    setFileUrl(null);
+    setFileError(null);
+    fetchFileUrl()
+      .then((url) => { if (!cancelled) setFileUrl(url); })
+      .catch(() => { if (!cancelled) setFileError('Failed to load PDF file'); });
+    return () => { cancelled = true; };
+  }, [cv.id, token]);
   
   const fetchAnonymized = async () => {
     try {
@@ -124,16 +146,18 @@ const FileViewer: React.FC<{ cv: CV; token: string | null }> = ({ cv, token }) =
           </Box>
         </Box>
         <Box sx={{ flex: 1, position: 'relative' }}>
-          <iframe
-            src={`${API}/cv/${cv.id}/view`}
-            style={{
-              width: '100%',
-              height: '100%',
-              border: 'none'
-            }}
-            title={cv.filename}
-            onError={() => setFileError('Failed to load PDF file')}
-          />
+          {fileUrl && (
+            <iframe
+              src={fileUrl}
+              style={{
+                width: '100%',
+                height: '100%',
+                border: 'none'
+              }}
+              title={cv.filename}
+              onError={() => setFileError('Failed to load PDF file')}
+            />
+          )}
           {fileError && (
             <Box sx={{ 
               position: 'absolute', 
@@ -177,11 +201,8 @@ const FileViewer: React.FC<{ cv: CV; token: string | null }> = ({ cv, token }) =
       const loadDocx = async () => {
         setLoadingDocx(true);
         try {
-          const res = await fetch(`${API}/cv/${cv.id}/view`);
-          if (!res.ok) throw new Error('Failed to fetch docx');
-          const data = await res.json();
-          const { data_url } = data;
-          const response = await fetch(data_url);
+          const url = await fetchFileUrl();
+          const response = await fetch(url);
           const arrayBuffer = await response.arrayBuffer();
           if (!cancelled && viewerRef.current) {
             viewerRef.current.innerHTML = '';
@@ -224,9 +245,9 @@ const FileViewer: React.FC<{ cv: CV; token: string | null }> = ({ cv, token }) =
           <Button
             variant="outlined"
             size="small"
-            onClick={() => {
+            onClick={async () => {
               const link = document.createElement('a');
-              link.href = `${API}/cv/${cv.id}/file`;
+              link.href = await fetchFileUrl(true);
               link.download = cv.filename;
               link.target = '_blank';
               document.body.appendChild(link);
@@ -263,9 +284,9 @@ const FileViewer: React.FC<{ cv: CV; token: string | null }> = ({ cv, token }) =
         <Button
           variant="outlined"
           size="small"
-          onClick={() => {
+          onClick={async () => {
             const link = document.createElement('a');
-            link.href = `${API}/cv/${cv.id}/file`;
+            link.href = await fetchFileUrl(true);
             link.download = cv.filename;
             link.target = '_blank';
             document.body.appendChild(link);
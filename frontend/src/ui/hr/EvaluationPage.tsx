@@ -90,6 +90,10 @@ interface EvaluationResult {
   score?: number
 }
 
+interface StreamedEvaluationResult extends EvaluationResult {
+  row: number
+}
+
 type MatchingMethod = 'threshold' | 'description'
 
 export const EvaluationPage: React.FC = () => {
@@ -99,6 +103,8 @@ export const EvaluationPage: React.FC = () => {
   
   // State management
   const [selectedFile, setSelectedFile] = useState<File | null>(null)
+  // Id of the file stored by /evaluation/upload; later steps send it instead of re-uploading the file
+  const [fileId, setFileId] = useState<string | null>(null)
   const [fileColumns, setFileColumns] = useState<string[]>([])
   const [columnMapping, setColumnMapping] = useState<ColumnMapping>({
     cvTextColumn: '',
@@ -132,11 +138,11 @@ export const EvaluationPage: React.FC = () => {
     setError(null)
 
     try {
-      // Send file to backend for parsing
+      // Send file to backend for parsing; it is stored there for the following steps
       const formData = new FormData()
       formData.append('file', file)
       
-      const response = await axios.post(`${API}/evaluation/parse-file`, formData, {
+      const response = await axios.post(`${API}/evaluation/upload`, formData, {
         headers: {
           ...headers,
           'Content-Type': 'multipart/form-data'
@@ -145,6 +151,7 @@ export const EvaluationPage: React.FC = () => {
       
       setFileColumns(response.data.columns)
       setTotalRows(response.data.total_rows)
+      setFileId(response.data.file_id)
       setSelectedFile(file)
       setShowColumnDialog(true)
     } catch (err: any) {
@@ -164,9 +171,9 @@ export const EvaluationPage: React.FC = () => {
 
     setLoading(true)
     try {
-      // Send file to backend for label analysis
+      // Ask backend to analyze labels of the stored file
       const formData = new FormData()
-      formData.append('file', selectedFile!)
+      formData.append('file_id', fileId!)
       formData.append('label_column', columnMapping.labelColumn)
       
       const response = await axios.post(`${API}/evaluation/analyze-labels`, formData, {
@@ -260,7 +267,7 @@ export const EvaluationPage: React.FC = () => {
     try {
       // Send evaluation request to backend
       const formData = new FormData()
-      formData.append('file', selectedFile!)
+      formData.append('file_id', fileId!)
       formData.append('cv_column', columnMapping.cvTextColumn)
       formData.append('jd_column', columnMapping.jdTextColumn)
       formData.append('label_column', columnMapping.labelColumn)
@@ -272,35 +279,71 @@ export const EvaluationPage: React.FC = () => {
         formData.append('label_rules', JSON.stringify(labelRules))
       }
       
-      const response = await axios.post(`${API}/evaluation/start-evaluation`, formData, {
-        headers: {
-          ...headers,
-          'Content-Type': 'multipart/form-data'
-        }
+      // Stream rows back as NDJSON so results show up while the rest are still running
+      formData.append('stream_results', 'true')
+
+      const response = await fetch(`${API}/evaluation/start-evaluation`, {
+        method: 'POST',
+        headers,
+        body: formData
       })
-      
-      // Handle results based on method
-      if (response.data.results) {
-        setEvaluationResults(response.data.results)
-        setShowEvaluationResults(true)
-        if (matchingMethod === 'threshold') {
-          setSuccess('Threshold-based evaluation completed!')
-        } else {
-          setSuccess('Description-based evaluation completed!')
+
+      if (!response.ok || !response.body) {
+        const errText = await response.text()
+        let detail = errText
+        try {
+          detail = JSON.parse(errText).detail || errText
+        } catch {}
+        throw new Error(detail || 'Unknown error')
+      }
+
+      // Rows arrive in completion order; keep them sorted by their row number
+      const rows: StreamedEvaluationResult[] = []
+      setEvaluationResults([])
+      setShowEvaluationResults(true)
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffered = ''
+      let finished = false
+      while (true) {
+        const { done, value } = await reader.read()
+        buffered += decoder.decode(value, { stream: !done })
+        const lines = buffered.split('\n')
+        buffered = done ? '' : lines.pop() || ''
+
+        const newRows: StreamedEvaluationResult[] = []
+        for (const line of lines) {
+          if (!line.trim()) continue
+          const message = JSON.parse(line)
+          if (message.status === 'error') {
+            throw new Error(message.detail)
+          } else if (message.status === 'done') {
+            finished = true
+          } else {
+            newRows.push(message)
+          }
         }
+        if (newRows.length > 0) {
+          rows.push(...newRows)
+          rows.sort((a, b) => a.row - b.row)
+          setEvaluationResults([...rows])
+        }
+        if (done) break
+      }
+
+      if (!finished) {
+        throw new Error('Evaluation stream ended unexpectedly')
+      }
+
+      // Handle results based on method
+      if (matchingMethod === 'threshold') {
+        setSuccess('Threshold-based evaluation completed!')
       } else {
-        setEvaluationData({
-          file: selectedFile!,
-          columns: fileColumns,
-          columnMapping,
-          labelInfo,
-          labelRules,
-          totalRows
-        })
-        setSuccess('Evaluation started successfully!')
+        setSuccess('Description-based evaluation completed!')
       }
     } catch (err: any) {
-      setError('Failed to start evaluation: ' + (err.response?.data?.detail || err.message || 'Unknown error'))
+      setError('Failed to start evaluation: ' + (err.message || 'Unknown error'))
     } finally {
       setLoading(false)
     }
@@ -309,6 +352,7 @@ export const EvaluationPage: React.FC = () => {
   // Remove selected file
   const removeSelectedFile = () => {
     setSelectedFile(null)
+    setFileId(null)
     setFileColumns([])
     setColumnMapping({ cvTextColumn: '', jdTextColumn: '', labelColumn: '' })
     setLabelInfo([])
@@ -33,6 +33,7 @@ type Config = {
   llm_temperature: number
   llm_top_p: number
   llm_max_tokens: number
+  llm_request_timeout: number
   ollama_base_url?: string
 }
 
@@ -81,6 +82,7 @@ export const LLMSettingsDialog: React.FC<LLMSettingsDialogProps> = ({ open, onCl
     llm_temperature: 0.2, 
     llm_top_p: 1, 
     llm_max_tokens: 1024,
+    llm_request_timeout: 15,
     ollama_base_url: ''
   })
   const headers = { Authorization: `Bearer ${token}` }
@@ -265,6 +267,16 @@ export const LLMSettingsDialog: React.FC<LLMSettingsDialogProps> = ({ open, onCl
                     fullWidth
                   />
                 )}
+
+                <TextField 
+                  label="Request Timeout (seconds)" 
+                  type="number" 
+                  value={cfg.llm_request_timeout} 
+                  onChange={e => setCfg({ ...cfg, llm_request_timeout: Number(e.target.value) })} 
+                  inputProps={{ min: 1, max: 120, step: 1 }}
+                  helperText="Per attempt; slow or failed calls are retried up to 3 times"
+                  fullWidth
+                />
               </Stack>
             </AccordionDetails>
           </Accordion>